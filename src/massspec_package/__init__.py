@@ -2,15 +2,31 @@
 Mass Spectrometry Data Processing Package
 """
 
-from .data_processor import DataProcessor
-from .voltage_plotter import VoltagePlotter
-import tkinter as tk
 import gc  # Import garbage collection module
+import importlib
 
 __version__ = "0.2.0"
 
+# Loaded on first attribute access so that importing the package stays cheap
+# and works on hosts without Tk; the launchers import tkinter when called.
+_LAZY_ATTRS = {
+    'DataProcessor': '.data_processor',
+    'VoltagePlotter': '.voltage_plotter',
+}
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        value = getattr(importlib.import_module(_LAZY_ATTRS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
+
 def launch_background_subtractor():
     """Launches the GUI for the Difference Plotter."""
+    import tkinter as tk
     from .gui import App
 
     root = tk.Tk()
@@ -21,6 +37,7 @@ def launch_background_subtractor():
 
 def launch_intensity_over_time():
     """Launches the GUI for Intensity Over Time."""
+    import tkinter as tk
     from .intensity_over_time import App as IntensityApp
 
     root = tk.Tk()
@@ -31,6 +48,7 @@ def launch_intensity_over_time():
 
 def launch_single_waveform_analysis():
     """Launches the GUI for Single Waveform Analysis."""
+    import tkinter as tk
     from .single_waveform import App as SingleWaveformApp
 
     root = tk.Tk()
@@ -41,6 +59,7 @@ def launch_single_waveform_analysis():
 
 def launch_calibration():
     """Launches the GUI for Calibration."""
+    import tkinter as tk
     from .calibration import App as CalibrationApp
 
     root = tk.Tk()
@@ -0,0 +1,91 @@
+import os
+import json
+import numpy as np
+from .decoder import DATA32_DTYPE, decode_file
+
+ARCHIVE_EXT = '.d32pack'
+
+_MAGIC = b'D32PACK1'
+_ALIGN = 4096  # data starts on a page boundary so it can be memory-mapped
+
+
+def is_archive(path):
+    """True if ``path`` is a packed .data32 archive."""
+    if not path or not os.path.isfile(path):
+        return False
+    with open(path, 'rb') as f:
+        return f.read(len(_MAGIC)) == _MAGIC
+
+
+def pack(folder_path, archive_path=None, files=None, progress_callback=None):
+    """
+    Pack a folder of .data32 files into one archive.
+
+    The files (natural order unless ``files`` is given) become the rows of a
+    single little-endian uint32 matrix; shorter files are zero-padded and
+    their true lengths are kept in the index together with the names.
+    Returns the archive path (default: ``<folder>.d32pack``).
+    """
+    from .dataset import list_data32_files
+    files = list(files) if files is not None else list_data32_files(folder_path)
+    archive_path = archive_path or os.path.normpath(folder_path) + ARCHIVE_EXT
+    paths = [os.path.join(folder_path, f) for f in files]
+    lengths = [os.path.getsize(p) // DATA32_DTYPE.itemsize for p in paths]
+    width = max(lengths, default=0)
+
+    header = json.dumps({'files': files, 'lengths': lengths, 'width': width}).encode()
+    offset = -(-(len(_MAGIC) + 8 + len(header)) // _ALIGN) * _ALIGN
+    with open(archive_path, 'wb') as f:
+        f.write(_MAGIC + np.uint64(len(header)).tobytes() + header)
+        f.write(b'\0' * (offset - f.tell()))
+        for i, (path, n) in enumerate(zip(paths, lengths)):
+            row = decode_file(path)[:n]
+            f.write(row.tobytes())
+            f.write(b'\0' * ((width - len(row)) * DATA32_DTYPE.itemsize))
+            if progress_callback:
+                progress_callback(i + 1)
+    return archive_path
+
+
+def unpack(archive_path, folder_path):
+    """Write every archived file back to ``folder_path`` under its original name."""
+    archive = Archive(archive_path)
+    os.makedirs(folder_path, exist_ok=True)
+    for name in archive.files:
+        archive[name].tofile(os.path.join(folder_path, name))
+    return folder_path
+
+
+class Archive:
+    """
+    Read-only view of a packed archive.
+
+    The index is read from the header and the sample matrix is memory-mapped
+    at its page-aligned offset, so opening costs one small read and rows are
+    only paged in when accessed.
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{path} is not a .data32 archive")
+            size = int(np.frombuffer(f.read(8), dtype='<u8')[0])
+            header = json.loads(f.read(size))
+        self.files = header['files']
+        self.lengths = np.asarray(header['lengths'], dtype=np.int64)
+        self._rows = {name: i for i, name in enumerate(self.files)}
+        shape = (len(self.files), header['width'])
+        if shape[0] * shape[1] == 0:
+            self.data = np.zeros(shape, dtype=DATA32_DTYPE)  # mmap can't map nothing
+        else:
+            offset = -(-(len(_MAGIC) + 8 + size) // _ALIGN) * _ALIGN
+            self.data = np.asarray(np.memmap(path, dtype=DATA32_DTYPE, mode='r',
+                                             offset=offset, shape=shape))
+
+    def __len__(self):
+        return len(self.files)
+
+    def __getitem__(self, key):
+        """uint32 view of one archived file given its position or name."""
+        i = key if isinstance(key, (int, np.integer)) else self._rows[key]
+        return self.data[i, :self.lengths[i]]
@@ -0,0 +1,156 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+import numpy as np
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'massspec_package')
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3  # 2 GiB
+
+_MANIFEST = 'manifest.json'
+
+
+def file_fingerprints(file_paths):
+    """(name, size, mtime_ns) for each file; changes whenever a file is rewritten."""
+    out = []
+    for path in file_paths:
+        st = os.stat(path)
+        out.append((os.path.basename(path), st.st_size, st.st_mtime_ns))
+    return out
+
+
+class SumCache:
+    """
+    Persistent cache of summed folder spectra.
+
+    Each sum is stored as ``<key>.npy`` in ``cache_dir``; ``manifest.json``
+    records the source folder, size and last access of every entry. Keys are
+    derived from the name, size and mtime of every input file, so any change
+    on disk misses the cache. When the stored arrays exceed ``max_bytes`` the
+    least recently used entries are evicted. Files are written under unique
+    temporary names and moved into place, so processes sharing the cache
+    never read a partial file, and eviction works from the ``.npy`` files on
+    disk, so an entry lost from the manifest still counts towards the limit.
+    """
+    _lock = threading.Lock()  # measurement and background may be summed concurrently
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def key(self, folder_path, file_paths, dtype, **params):
+        """Cache key for summing ``file_paths`` with the given accumulator dtype."""
+        ident = {
+            'folder': os.path.abspath(folder_path),
+            'files': sorted(file_fingerprints(file_paths)),
+            'dtype': np.dtype(dtype).name,
+            'params': params,
+        }
+        return hashlib.sha256(json.dumps(ident, sort_keys=True).encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + '.npy')
+
+    def _load_manifest(self):
+        try:
+            with open(os.path.join(self.cache_dir, _MANIFEST)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _replace(self, path, write):
+        # a unique temp file per writer; the lock only covers this process
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+
+    def _save_manifest(self, manifest):
+        data = json.dumps(manifest).encode()
+        self._replace(os.path.join(self.cache_dir, _MANIFEST), lambda f: f.write(data))
+
+    def _stored(self, manifest):
+        # key -> (bytes, last access) of every array actually on disk; the
+        # manifest is only a hint, as processes sharing the directory may
+        # overwrite each other's entries (then the file mtime is used)
+        stored = {}
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return stored
+        for name in names:
+            key, ext = os.path.splitext(name)
+            if ext != '.npy':
+                continue
+            try:
+                st = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue  # evicted by another process
+            stored[key] = (st.st_size, manifest.get(key, {}).get('last_access', st.st_mtime))
+        return stored
+
+    def get(self, key):
+        """The cached array for ``key``, or None on a miss."""
+        with self._lock:
+            try:
+                array = np.load(self._path(key))
+            except FileNotFoundError:
+                return None
+            except (OSError, ValueError):
+                self._remove(key)
+                return None
+            manifest = self._load_manifest()
+            entry = manifest.setdefault(key, {'folder': None, 'bytes': array.nbytes})
+            entry['last_access'] = time.time()
+            self._save_manifest(manifest)
+            return array
+
+    def put(self, key, array, folder_path=None):
+        """Store ``array`` under ``key`` and evict old entries beyond ``max_bytes``."""
+        with self._lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path(key)
+            self._replace(path, lambda f: np.save(f, array))
+            manifest = self._load_manifest()
+            manifest[key] = {
+                'folder': folder_path,
+                'bytes': os.path.getsize(path),
+                'last_access': time.time(),
+            }
+            self._evict(manifest)
+            self._save_manifest(manifest)
+
+    def _remove(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _evict(self, manifest):
+        stored = self._stored(manifest)
+        for key in set(manifest) - set(stored):
+            del manifest[key]  # file already gone
+        total = sum(size for size, _ in stored.values())
+        for key in sorted(stored, key=lambda k: stored[k][1]):
+            if total <= self.max_bytes:
+                break
+            total -= stored[key][0]
+            manifest.pop(key, None)
+            self._remove(key)
+
+    def clear(self):
+        """Remove every cached entry."""
+        with self._lock:
+            for key in self._stored({}):
+                self._remove(key)
+            if os.path.isdir(self.cache_dir):
+                self._save_manifest({})
@@ -1,9 +1,17 @@
-import os, json, threading, numpy as np, matplotlib.pyplot as plt, tkinter as tk
+import os, json, numpy as np, tkinter as tk
 import tkinter.font as tkfont
 from tkinter import ttk, filedialog, messagebox
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-from scipy.signal import find_peaks
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image, ImageTk
+from .decoder import decode_file
+from .cache import DEFAULT_CACHE_DIR, SumCache
+from .data_processor import DataProcessor as FolderSummer
+from .dataset import list_data32_files
+from .calibration_engine import Y_PRESSURE, Calibration
+from .export import binary_filetypes, is_binary_path, save_arrays
+from .jobs import BackgroundJob
+from .peaks import peak_areas
+from .plotting import DecimatedLine, PlotPanel
 
 # Pillow compatibility
 try:
@@ -43,27 +51,20 @@ class DraggableLine:
 
 # ───────────────────────── Simple data processors ───────────────────────────
 class DataProcessor:
-    def __init__(self, folder, progress_cb=None, stop_ev=None):
-        self.folder, self.cb, self.stop = folder, progress_cb, stop_ev
-    def _decode(self, path):
-        out=[]
-        with open(path,'rb') as f:
-            while not (self.stop and self.stop.is_set()):
-                chunk=f.read(4)
-                if not chunk: break
-                out.append(int.from_bytes(chunk,'little'))
-        return out
+    def __init__(self, folder, progress_cb=None, stop_ev=None, workers=1, cache=None):
+        self.folder, self.cb, self.stop, self.workers, self.cache = folder, progress_cb, stop_ev, workers, cache
+    def _decode(self, path): return decode_file(path, self.stop)
     def summed(self):
-        mats=[]; files=[f for f in os.listdir(self.folder) if f.endswith('.data32')]
-        for i,fn in enumerate(files):
-            if self.stop and self.stop.is_set(): return np.array([])
-            mats.append(self._decode(os.path.join(self.folder,fn)))
-            if self.cb: self.cb(i+1)
-        return np.sum(np.array(mats,dtype=np.float64),axis=0) if mats else np.array([])
+        out=FolderSummer(self.folder,self.cb,self.stop,workers=self.workers,cache=self.cache).calculate_summed_voltages()
+        return np.asarray(out,dtype=np.float64)   # [] when stopped
 
 class VoltagePlotter:
     def __init__(self, mea, bkg): self.mea, self.bkg = mea, bkg
-    def calculate(self): self.diff = self.mea.summed() - self.bkg.summed()
+    def calculate(self, concurrent=False):
+        if not concurrent: self.diff = self.mea.summed() - self.bkg.summed(); return
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            mea, bkg = pool.submit(self.mea.summed), pool.submit(self.bkg.summed)
+            self.diff = mea.result() - bkg.result()
 
 
 # ────────────────────────────────── GUI ─────────────────────────────────────
@@ -71,9 +72,11 @@ class App:
     def __init__(self, root):
         self.root = root
         self.base_w, self.base_h = 850, 550
-        self.stop_ev = threading.Event()
+        self.job = None   # BackgroundJob summing the folders
         self.title_var = tk.StringVar(value='TOF‑Calibrated Difference Plot')
         self._debounce_id, self._click_cids = None, []
+        # plot panels are built on first use and reused for every redraw
+        self.raw_panel = self.cal_panel = self.final_panel = self.ycal_panel = None
 
         # load settings
         self.cfg, self.ui_scale = {}, 1.0
@@ -96,6 +99,8 @@ class App:
         root.title('Calibration')
         icon = tk.PhotoImage(file=_LOGO_PATH); root.iconphoto(True, icon)
 
+        self.sum_cache = SumCache(self.cfg.get('cache_dir', DEFAULT_CACHE_DIR))
+
         # folders & Y‑cal mode
         self.meas_dir = self.cfg.get('measurement_folder') if os.path.isdir(self.cfg.get('measurement_folder','')) else None
         self.back_dir = self.cfg.get('background_folder')  if os.path.isdir(self.cfg.get('background_folder','' )) else None
@@ -234,28 +239,26 @@ class App:
     def _process(self):
         if not self.meas_dir or not self.back_dir:
             messagebox.showwarning('Folders not selected','Select both folders'); return
-        n_meas=len([f for f in os.listdir(self.meas_dir) if f.endswith('.data32')])
-        n_back=len([f for f in os.listdir(self.back_dir) if f.endswith('.data32')])
+        n_meas=len(list_data32_files(self.meas_dir))   # shared folder index, reused by the sum
+        n_back=len(list_data32_files(self.back_dir))
         self.total=n_meas+n_back; self.done=0; self.progress['value']=0
-        self.raw_btn['state']='disabled'; self.stop_ev.clear()
-        threading.Thread(target=self._worker,daemon=True).start()
-    def _update(self,_): self.done+=1; self.progress['value']=(self.done/self.total)*100; self.root.update_idletasks()
-    def _worker(self):
-        mea=DataProcessor(self.meas_dir,self._update,self.stop_ev)
-        bkg=DataProcessor(self.back_dir,self._update,self.stop_ev)
-        self.vp=VoltagePlotter(mea,bkg); self.vp.calculate()
-        self.root.after(0,lambda:self.raw_btn.config(state='normal'))
-        self.root.after(0,lambda:self.nb.select(self.tab_raw))
-        self.root.after(0,self._draw_raw)
+        self.raw_btn['state']='disabled'
+        if self.job: self.job.cancel()
+        self.job=BackgroundJob(self.root,self._worker,on_progress=self._update,on_done=self._on_summed,
+                               on_error=lambda e:messagebox.showerror('Error',str(e))).start()
+    def _update(self,done): self.done=done; self.progress['value']=(self.done/self.total)*100
+    def _worker(self,job):   # worker thread: no Tk calls
+        mea=DataProcessor(self.meas_dir,job.step,job.stop_event,workers=os.cpu_count(),cache=self.sum_cache)
+        bkg=DataProcessor(self.back_dir,job.step,job.stop_event,workers=os.cpu_count(),cache=self.sum_cache)
+        vp=VoltagePlotter(mea,bkg); vp.calculate(concurrent=True); return vp
+    def _on_summed(self,vp):
+        self.vp=vp; self.raw_btn.config(state='normal'); self.nb.select(self.tab_raw); self._draw_raw()
 
     def _draw_raw(self):
-        for w in self.raw_canvas.winfo_children(): w.destroy()
-        fig,ax=plt.subplots(figsize=(8,4))
-        ax.plot(self.vp.diff); ax.set_ylabel('Intensity'); ax.set_title('Raw Difference'); ax.grid()
-        canvas=FigureCanvasTkAgg(fig,master=self.raw_canvas)
-        tb=NavigationToolbar2Tk(canvas,self.raw_canvas,pack_toolbar=False); tb.update()
-        tb.pack(side=tk.TOP,fill=tk.X)
-        canvas.get_tk_widget().pack(fill='both',expand=True); canvas.draw()
+        if self.raw_panel is None: self.raw_panel=PlotPanel(self.raw_canvas,figsize=(8,4))
+        ax=self.raw_panel.axes()
+        DecimatedLine(ax,None,self.vp.diff); ax.set_ylabel('Intensity'); ax.set_title('Raw Difference'); ax.grid()
+        self.raw_panel.draw()
 
     # ───────────────────────── X‑Calibration tab ───────────────────────────
     def _show_cal(self):
@@ -266,7 +269,7 @@ class App:
         self._click_cids.clear()
 
         for w in self.cal_ctrl.winfo_children(): w.destroy()
-        for w in self.cal_canvas_frame.winfo_children(): w.destroy()
+        if self.cal_panel is not None: self.cal_panel.close()   # drops old drag/click handlers too
         self.nb.select(self.tab_cal)
 
         T=np.arange(len(self.vp.diff)); n=len(T)-1
@@ -296,15 +299,13 @@ class App:
         ttk.Entry(self.cal_ctrl,textvariable=self.m2_var,width=8).grid(row=2,column=3,padx=5)
 
         # figure
-        fig,ax=plt.subplots(figsize=(8,4))
-        ax.plot(T,self.vp.diff); ax.set_ylabel('Intensity'); ax.set_title('Drag lines, edit boxes, or click plot'); ax.grid()
+        self.cal_panel=PlotPanel(self.cal_canvas_frame,figsize=(8,4)); self.cal_canvas=self.cal_panel.canvas
+        ax=self.cal_panel.axes()
+        DecimatedLine(ax,T,self.vp.diff); ax.set_ylabel('Intensity'); ax.set_title('Drag lines, edit boxes, or click plot'); ax.grid()
         self.l1=ax.axvline(self.cur_x1,color='r',ls='--',label='T₁')
         self.l2=ax.axvline(self.cur_x2,color='g',ls='--',label='T₂'); ax.legend()
-        self.cal_canvas=FigureCanvasTkAgg(fig,master=self.cal_canvas_frame)
-        tb=NavigationToolbar2Tk(self.cal_canvas,self.cal_canvas_frame,pack_toolbar=False); tb.update()
-        tb.pack(side=tk.TOP,fill=tk.X)
-        self.cal_canvas.get_tk_widget().pack(fill='both',expand=True); self.cal_canvas.draw()
-        cid=fig.canvas.mpl_connect('button_press_event',self._plot_click); self._click_cids.append(cid)
+        self.cal_canvas.draw()
+        cid=self.cal_canvas.mpl_connect('button_press_event',self._plot_click); self._click_cids.append(cid)
 
         ttk.Button(self.cal_ctrl,text='Confirm & Calibrate',command=self._confirm_cal).grid(row=3,column=0,columnspan=4,pady=8)
         DraggableLine(self.l1,self._drag1); DraggableLine(self.l2,self._drag2)
@@ -340,11 +341,10 @@ class App:
         try: m1=float(self.m1_var.get()); m2=float(self.m2_var.get())
         except ValueError:
             messagebox.showerror('Invalid','m₁,m₂ must be numeric'); return
-        if self.cur_x1==self.cur_x2 or m1<=0 or m2<=0:
-            messagebox.showerror('Invalid','Ensure T₁≠T₂ and m₁,m₂>0'); return
-        C=(self.cur_x1-self.cur_x2)/(np.sqrt(m1)-np.sqrt(m2))
-        t0=self.cur_x1-C*np.sqrt(m1)
-        T=np.arange(len(self.vp.diff)); self.mq=((T-t0)/C)**2; self.intens=self.vp.diff
+        try: self.cal=Calibration.from_points([self.cur_x1,self.cur_x2],[m1,m2])
+        except ValueError:
+            messagebox.showerror('Invalid','Ensure T₁≠T₂, m₁≠m₂ and m₁,m₂>0'); return
+        self.mq=self.cal.mq_axis(len(self.vp.diff)); self.intens=self.vp.diff
         self.cal_m1,self.cal_m2=m1,m2
         self.win1_var.set(self.mq.min()); self.win2_var.set(self.mq.max())
 
@@ -363,6 +363,10 @@ class App:
         for w in self.final_ctrl.winfo_children(): w.destroy()
         ttk.Button(self.final_ctrl,text='Export Data',
                    command=lambda:self._export(self.mq,self.intens)).pack(side='left',padx=5)
+        ttk.Button(self.final_ctrl,text='Save Calibration',command=self._save_cal).pack(side='left',padx=5)
+        self.bin_var=tk.StringVar(value='')   # empty: export every sample
+        ttk.Label(self.final_ctrl,text='Bin width (m/q):').pack(side='left',padx=5)
+        ttk.Entry(self.final_ctrl,textvariable=self.bin_var,width=6).pack(side='left',padx=5)
         ttk.Label(self.final_ctrl,text='Plot Title:').pack(side='left',padx=5)
         ttk.Entry(self.final_ctrl,textvariable=self.title_var,width=30).pack(side='left',padx=5)
         ttk.Button(self.final_ctrl,text='Update Title',command=self._draw_final).pack(side='left',padx=5)
@@ -376,48 +380,35 @@ class App:
                 .pack(side='left',padx=5)
 
     def _draw_final(self):
-        for w in self.final_canvas.winfo_children(): w.destroy()
-        fig,ax=plt.subplots(figsize=(4,2),tight_layout=True)
+        if self.final_panel is None: self.final_panel=PlotPanel(self.final_canvas,figsize=(4,2),tight_layout=True)
+        ax=self.final_panel.axes()
         y=self.intens.copy(); ylabel='Intensity'
-        if self.use_ycal.get():
-            if self.ycal_type=='Absolute pressure':
-                y=self.ycal_coeffs(y); ylabel='Pressure (mbar)'
-            else:
-                y*=self.ycal2_coeff; ylabel='Normalized Intensity'
+        if self.use_ycal.get() and self.cal.y_mode:
+            y=self.cal.apply_y(self.intens)
+            ylabel='Pressure (mbar)' if self.cal.y_mode==Y_PRESSURE else 'Normalized Intensity'
         if self.log_y.get(): ax.set_yscale('log')
-        ax.plot(self.mq,y,label='Spectrum')
+        DecimatedLine(ax,self.mq,y,label='Spectrum')
         ax.set_xlabel('m/q'); ax.set_ylabel(ylabel); ax.set_title(self.title_var.get())
         if self.show_lines.get():
             ax.axvline(self.cal_m1,ls='--',label=f'm₁={self.cal_m1}')
             ax.axvline(self.cal_m2,ls='--',label=f'm₂={self.cal_m2}')
         if self.show_leg.get(): ax.legend()
         ax.grid(True)
-        canvas=FigureCanvasTkAgg(fig,master=self.final_canvas)
-        tb=NavigationToolbar2Tk(canvas,self.final_canvas,pack_toolbar=False); tb.update()
-        tb.pack(side=tk.TOP,fill=tk.X)
-        canvas.get_tk_widget().pack(fill='both',expand=True); canvas.draw()
+        self.final_panel.draw()
 
     # ───────────────────── Y‑axis calibration helpers ──────────────────────
-    def calculate_peak_areas(self,x,y,h):
-        peaks,_=find_peaks(y,height=h)
-        areas,crossings=[],[]
-        for p in peaks:
-            l,r=p,p
-            while l>0 and y[l]>0: l-=1
-            while r<len(y)-1 and y[r]>0: r+=1
-            areas.append(np.sum(y[l:r+1])); crossings.append((x[l],x[r]))
-        return np.array(areas),crossings,peaks
+    def calculate_peak_areas(self,x,y,h): return peak_areas(x,y,h)
     _calc_peaks=calculate_peak_areas
 
     def _run_y_detect(self):
-        # clear previous content
-        for w in self.ycal_canvas.winfo_children(): w.destroy()
+        if self.ycal_panel is None:
+            self.ycal_panel=PlotPanel(self.ycal_canvas,figsize=None,toolbar=False,constrained_layout=True)
 
         x, y   = self.mq, self.intens
         h      = self.h_var.get()
         w1, w2 = self.win1_var.get(), self.win2_var.get()
-        mask   = (x>=w1) & (x<=w2)
-        xw, yw = x[mask], y[mask]
+        win    = self.cal.window(len(y), w1, w2)   # views on the physical branch
+        xw, yw = x[win], y[win]
 
         if not xw.size:
             messagebox.showerror("Empty Window", f"No data in m/q window {w1}–{w2}.")
@@ -430,37 +421,30 @@ class App:
             return
 
         # ----- build the figure depending on mode -----
-        if self.ycal_type == 'Absolute pressure':
-            p0 = self.p0_var.get()
-            total = areas.sum()
-            partial = p0 * areas / total
+        if self.ycal_type == Y_PRESSURE:
             heights = yw[peaks]
+            partial = self.cal.fit_pressure(heights, areas, self.p0_var.get())
+            coeffs = self.cal.y_coeffs
 
-            coeffs = np.polyfit(heights, partial, 1)
-            self.ycal_coeffs = np.poly1d(coeffs)
-
-            fig,(ax_spec,ax_fit)=plt.subplots(2,1,constrained_layout=True)
+            ax_spec,ax_fit=self.ycal_panel.axes(2,1)
             ax_spec.plot(xw,yw); ax_spec.scatter(xw[peaks],yw[peaks],c='r',s=20)
             ax_spec.set_xlabel('m/q'); ax_spec.set_ylabel('Intensity')
             ax_spec.set_title(f'Peaks @ h={h}'); ax_spec.grid(True)
 
             xs=np.linspace(heights.min(),heights.max(),200)
             ax_fit.scatter(heights,partial,c='r',label='Data')
-            ax_fit.plot(xs,self.ycal_coeffs(xs),
+            ax_fit.plot(xs,np.polyval(coeffs,xs),
                         label=f'y={coeffs[0]:.3e}x+{coeffs[1]:.3e}')
             ax_fit.set_xlabel('Peak height'); ax_fit.set_ylabel('Partial pressure (mbar)')
             ax_fit.set_title('Y‑calibration fit'); ax_fit.legend(); ax_fit.grid(True)
         else:
-            self.ycal2_coeff=100.0 / yw[peaks].max()
-            fig,ax_spec=plt.subplots(constrained_layout=True)
+            self.cal.fit_normalization(yw[peaks])
+            ax_spec=self.ycal_panel.axes()
             ax_spec.plot(xw,yw); ax_spec.scatter(xw[peaks],yw[peaks],s=20)
             ax_spec.set_xlabel('m/q'); ax_spec.set_ylabel('Intensity')
             ax_spec.set_title(f'Peaks @ h={h}'); ax_spec.grid(True)
 
-        # embed
-        canvas=FigureCanvasTkAgg(fig,master=self.ycal_canvas)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill='both',expand=True)
+        self.ycal_panel.draw()
 
         self.yapply_btn['state']='normal'
 
@@ -469,22 +453,39 @@ class App:
 
     # ─────────────────────────── export helper ─────────────────────────────
     def _export(self,mq,intens):
-        if self.use_ycal.get():
-            if self.ycal_type=='Absolute pressure':
-                y=self.ycal_coeffs(intens); hdr='m/q\tpressure (mbar)'; fmt=('%.6f','%.9e')
-            else:
-                y=intens*self.ycal2_coeff; hdr='m/q\tnorm intensity'; fmt=('%.6f','%.6f')
+        try: width=float(self.bin_var.get() or 0)
+        except ValueError:
+            messagebox.showerror('Invalid','Bin width must be numeric'); return
+        y=intens
+        if width>0: mq,y=self.cal.rebin(y,width)   # uniform m/q grid of raw sums
+        if self.use_ycal.get() and self.cal.y_mode:
+            y=self.cal.apply_y(y)   # after binning, so the pressure offset counts once per bin
+            if self.cal.y_mode==Y_PRESSURE: hdr='m/q\tpressure (mbar)'; fmt=('%.6f','%.9e')
+            else: hdr='m/q\tnorm intensity'; fmt=('%.6f','%.6f')
         else:
-            y=intens; hdr='m/q\tintensity'; fmt=('%.6f','%.6f')
+            hdr='m/q\tintensity'; fmt=('%.6f','%.6f')
         fp=filedialog.asksaveasfilename(defaultextension='.txt',
-                                        filetypes=[('Text files','*.txt'),('All files','*.*')])
+                                        filetypes=[('Text files','*.txt')]+binary_filetypes()+[('All files','*.*')])
         if not fp: return
-        np.savetxt(fp,np.vstack([mq,y]).T,delimiter='\t',header=hdr,comments='',fmt=fmt)
+        if is_binary_path(fp):
+            meta=dict(self.cal.to_dict(),columns=hdr.split('\t'),bin_width=width or None,
+                      measurement_folder=self.meas_dir,background_folder=self.back_dir)
+            try: save_arrays(fp,{'mq':mq,'intensity':y},meta)
+            except Exception as e: messagebox.showerror('Error',str(e)); return
+        else:
+            np.savetxt(fp,np.vstack([mq,y]).T,delimiter='\t',header=hdr,comments='',fmt=fmt)
         messagebox.showinfo('Saved',fp)
 
+    def _save_cal(self):
+        fp=filedialog.asksaveasfilename(defaultextension='.json',
+                                        filetypes=[('Calibration','*.json'),('All files','*.*')])
+        if not fp: return
+        self.cal.save(fp); messagebox.showinfo('Saved',fp)
+
     # ─────────────────────────── utils & close ─────────────────────────────
     def _close(self):
-        self.stop_ev.set(); self.root.destroy()
+        if self.job: self.job.cancel()
+        self.root.destroy()
     def on_closing(self): self._close()
 
 
@@ -0,0 +1,183 @@
+import json
+import numpy as np
+
+Y_PRESSURE = 'Absolute pressure'
+Y_NORMALIZE = 'Normalize to 100'
+
+
+class Calibration:
+    """
+    X- and optional Y-calibration of TOF spectra, independent of the GUI.
+
+    The X-calibration maps sample index T to ``m/q = ((T - t0) / C)**2``.
+    The Y-calibration is either a linear fit of partial pressure against
+    peak height (``Absolute pressure``) or a scale factor that puts the
+    highest peak at 100 (``Normalize to 100``). The m/q axis is computed
+    once per spectrum length and shared by every spectrum of that length.
+    """
+    def __init__(self, C, t0, points=None, y_mode=None, y_coeffs=None, y_scale=None):
+        self.C = float(C)
+        self.t0 = float(t0)
+        self.points = [tuple(map(float, p)) for p in points or []]  # (T, m) references
+        self.y_mode = y_mode
+        self.y_coeffs = None if y_coeffs is None else np.asarray(y_coeffs, dtype=np.float64)
+        self.y_scale = y_scale
+        self._axes = {}  # spectrum length -> read-only m/q axis
+
+    @classmethod
+    def from_points(cls, times, masses):
+        """
+        Fit C and t0 to reference peaks at ``times`` with masses ``masses``.
+
+        Two points give the exact solution; more are fitted by least squares
+        on ``T = C*sqrt(m) + t0``.
+        """
+        times = np.asarray(times, dtype=np.float64)
+        masses = np.asarray(masses, dtype=np.float64)
+        if len(times) != len(masses) or len(times) < 2:
+            raise ValueError('Need at least two (T, m) reference points')
+        if np.any(masses <= 0) or len(np.unique(times)) < 2 or len(np.unique(masses)) < 2:
+            raise ValueError('Ensure distinct T values, distinct m values and m > 0')
+        if len(times) == 2:
+            C = (times[0] - times[1]) / (np.sqrt(masses[0]) - np.sqrt(masses[1]))
+            t0 = times[0] - C * np.sqrt(masses[0])
+        else:
+            C, t0 = np.polyfit(np.sqrt(masses), times, 1)
+        if not (np.isfinite(C) and np.isfinite(t0)) or C == 0:
+            raise ValueError(f'Reference points give no usable calibration (C={C}, t0={t0})')
+        return cls(C, t0, points=zip(times, masses))
+
+    # ───────────────────────── X-calibration ──────────────────────────────
+    def mq_axis(self, n):
+        """m/q of samples ``0..n-1``; cached and read-only."""
+        mq = self._axes.get(n)
+        if mq is None:
+            mq = ((np.arange(n) - self.t0) / self.C) ** 2
+            mq.flags.writeable = False
+            self._axes[n] = mq
+        return mq
+
+    def branch(self, n):
+        """
+        Slice of samples ``0..n-1`` on the physical branch ``(T - t0) / C >= 0``.
+
+        Before t0 the m/q formula folds back (m/q falls towards 0 and rises
+        again), so only this branch is monotonic in m/q: increasing for
+        ``C > 0``, decreasing for ``C < 0``.
+        """
+        if self.C > 0:
+            return slice(min(n, max(0, int(np.ceil(self.t0)))), n)
+        return slice(0, min(n, max(0, int(np.floor(self.t0)) + 1)))
+
+    def _sorted_branch(self, n):
+        sl = self.branch(n)
+        mq = self.mq_axis(n)[sl]
+        return sl, (mq if self.C > 0 else mq[::-1])
+
+    def window(self, n, lo, hi):
+        """
+        Slice of samples with ``lo <= m/q <= hi`` on the physical branch.
+
+        Found by binary search on the cached axis, so ``y[window]`` is a view
+        and costs O(log n) instead of masking the whole spectrum.
+        """
+        sl, mq = self._sorted_branch(n)
+        a = np.searchsorted(mq, lo, side='left')
+        b = np.searchsorted(mq, hi, side='right')
+        if self.C > 0:
+            return slice(sl.start + a, sl.start + b)
+        return slice(sl.stop - b, sl.stop - a)
+
+    def index_of(self, mq, n):
+        """Index of the first sample on the physical branch reaching ``mq`` (clipped)."""
+        sl, axis = self._sorted_branch(n)
+        i = np.minimum(np.searchsorted(axis, mq, side='left'), max(len(axis) - 1, 0))
+        return sl.start + i if self.C > 0 else sl.stop - 1 - i
+
+    def rebin(self, spectra, width, lo=None, hi=None):
+        """
+        Integrate intensities into uniform m/q bins.
+
+        Bins of ``width`` start at ``lo`` and extend until ``hi`` is covered
+        (defaults: the m/q range of the physical branch, with ``lo`` rounded
+        down to a multiple of ``width`` so every run shares one grid); bin
+        ``k`` sums the samples with ``lo + k*width <= m/q < lo + (k+1)*width``.
+        Works on one spectrum or a 2D batch. Returns ``(centers, sums)``, so
+        spectra rebinned with the same ``width``, ``lo`` and ``hi`` can be added.
+        """
+        if width <= 0:
+            raise ValueError('Bin width must be positive')
+        spectra = np.asarray(spectra)
+        sl, mq = self._sorted_branch(spectra.shape[-1])
+        y = spectra[..., sl] if self.C > 0 else spectra[..., sl][..., ::-1]
+        lo = (np.floor(mq[0] / width) * width if len(mq) else 0.0) if lo is None else lo
+        hi = (mq[-1] if len(mq) else lo) if hi is None else hi
+        n_bins = max(1, int(np.floor((hi - lo) / width)) + 1)
+        edges = lo + width * np.arange(n_bins + 1)
+        starts = np.searchsorted(mq, edges, side='left')
+        filled = np.diff(starts) > 0
+        # reduceat sums from each start to the next one; drop samples past the last edge
+        y = y[..., :starts[-1]]
+        sums = np.zeros(spectra.shape[:-1] + (n_bins,), dtype=np.result_type(y.dtype, np.float64))
+        if filled.any():
+            sums[..., filled] = np.add.reduceat(y, starts[:-1][filled], axis=-1)
+        return edges[:-1] + width / 2, sums
+
+    def time_of(self, mq):
+        """Sample position (possibly fractional) of m/q on the physical branch."""
+        return self.C * np.sqrt(mq) + self.t0
+
+    # ───────────────────────── Y-calibration ──────────────────────────────
+    def fit_pressure(self, heights, areas, p0):
+        """Fit partial pressure ``p0 * area / sum(areas)`` linearly against peak height."""
+        partial = p0 * np.asarray(areas) / np.sum(areas)
+        self.y_mode = Y_PRESSURE
+        self.y_coeffs = np.polyfit(heights, partial, 1)
+        return partial
+
+    def fit_normalization(self, heights):
+        """Scale intensities so that the highest peak becomes 100."""
+        self.y_mode = Y_NORMALIZE
+        self.y_scale = 100.0 / np.max(heights)
+
+    def apply_y(self, y):
+        """Y-calibrated copy of ``y`` (a copy of ``y`` if no Y-calibration is set)."""
+        if self.y_mode == Y_PRESSURE:
+            return np.polyval(self.y_coeffs, y)
+        if self.y_mode == Y_NORMALIZE:
+            return y * self.y_scale
+        return np.array(y, dtype=np.float64)
+
+    def apply(self, spectra, y=True):
+        """
+        Calibrate one spectrum or a 2D batch of equal-length spectra.
+
+        Returns ``(mq, intensities)``; the m/q axis is shared, intensities
+        are Y-calibrated when ``y`` is true and a Y-calibration is set.
+        """
+        spectra = np.asarray(spectra)
+        mq = self.mq_axis(spectra.shape[-1])
+        return mq, self.apply_y(spectra) if y else spectra
+
+    # ─────────────────────────── persistence ──────────────────────────────
+    def to_dict(self):
+        return {
+            'C': self.C, 't0': self.t0,
+            'points': [list(p) for p in self.points],
+            'y_mode': self.y_mode,
+            'y_coeffs': None if self.y_coeffs is None else self.y_coeffs.tolist(),
+            'y_scale': self.y_scale,
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d['C'], d['t0'], d.get('points'), d.get('y_mode'), d.get('y_coeffs'), d.get('y_scale'))
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
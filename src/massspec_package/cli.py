@@ -0,0 +1,225 @@
+# massspec_package/cli.py
+"""
+Headless batch entry point: ``massspec <command> ...``.
+
+Every folder argument may also be an archive made by ``massspec pack``.
+Outputs ending in .npy, .npz or .h5 are written in binary with metadata
+(see ``export.save_arrays``); anything else is text like the GUI exports.
+
+Nothing here imports tkinter or opens a window, so it runs on cluster
+nodes without a display.
+"""
+
+import os
+import sys
+import argparse
+import numpy as np
+
+from .archive import ARCHIVE_EXT, pack, unpack
+from .cache import DEFAULT_CACHE_DIR, SumCache
+from .calibration_engine import Y_PRESSURE, Calibration
+from .data_processor import DataProcessor
+from .dataset import Dataset, list_data32_files
+from .export import binary_filetypes, is_binary_path, save_arrays, write_columns, write_values
+from .intensity import intensity_series, parse_windows, window_series, write_window_csv
+from .voltage_plotter import VoltagePlotter
+
+_DTYPES = {'float64': np.float64, 'int64': np.int64, 'float32': np.float32}
+
+
+def _processor(folder, args):
+    cache = SumCache(args.cache_dir) if args.cache else None
+    return DataProcessor(folder, dtype=_DTYPES[args.dtype], workers=args.workers,
+                         backend=args.backend, cache=cache)
+
+
+def _difference(args):
+    vp = VoltagePlotter(_processor(args.measurement, args), _processor(args.background, args))
+    vp.calculate_difference(concurrent=True)
+    return vp.difference
+
+
+def _folders_meta(args):
+    return {'measurement_folder': os.path.abspath(args.measurement),
+            'background_folder': os.path.abspath(args.background),
+            'measurement_files': len(list_data32_files(args.measurement)),
+            'background_files': len(list_data32_files(args.background))}
+
+
+def cmd_subtract(args):
+    diff = _difference(args)
+    if is_binary_path(args.output):
+        save_arrays(args.output, {'difference': diff}, _folders_meta(args))
+    else:
+        write_values(args.output, diff)
+    print(f"{args.output}: {len(diff)} samples")
+
+
+def cmd_export(args):
+    os.makedirs(args.output_dir, exist_ok=True)
+    for folder in args.folders:
+        summed = _processor(folder, args).calculate_summed_voltages()
+        out = os.path.join(args.output_dir, os.path.basename(os.path.normpath(folder)) + args.ext)
+        if is_binary_path(out):
+            save_arrays(out, {'summed': summed}, {'folder': os.path.abspath(folder),
+                                                  'files': len(list_data32_files(folder))})
+        else:
+            write_values(out, summed)
+        print(f"{out}: {len(summed)} samples")
+
+
+def cmd_intensity(args):
+    files = list_data32_files(args.folder)[::max(1, args.skip)]
+    dataset = Dataset(args.folder, files)
+    paths = [dataset.source(fname) for fname in dataset.files]
+    xs = list(range(1, len(paths) + 1))
+    meta = {'folder': os.path.abspath(args.folder), 'x_min': args.x_min, 'x_max': args.x_max,
+            'skip': args.skip, 'files': files}
+    if args.windows:
+        windows = parse_windows(args.windows)
+        maxes, areas = window_series(paths, windows, args.area, args.workers)
+        if is_binary_path(args.output):
+            arrays = {'index': xs, 'max': maxes, 'windows': windows}
+            if areas is not None:
+                arrays['area'] = areas
+            save_arrays(args.output, arrays, meta)
+        else:
+            write_window_csv(args.output, xs, windows, maxes, areas)
+    else:
+        vals = intensity_series(paths, args.x_min, args.x_max, args.workers)
+        if is_binary_path(args.output):
+            save_arrays(args.output, {'index': xs, 'max': vals}, meta)
+        else:
+            write_columns(args.output, ['Index', 'MaxValue'], [xs, vals])
+    print(f"{args.output}: {len(paths)} files")
+
+
+def cmd_calibrate(args):
+    if args.calibration:
+        cal = Calibration.load(args.calibration)
+    elif args.t is not None and args.m is not None:
+        cal = Calibration.from_points(args.t, args.m)
+    elif None not in (args.t1, args.t2, args.m1, args.m2):
+        cal = Calibration.from_points([args.t1, args.t2], [args.m1, args.m2])
+    else:
+        raise SystemExit('calibrate: give --calibration FILE, --t/--m lists or all of --t1 --t2 --m1 --m2')
+    if args.save_calibration:
+        cal.save(args.save_calibration)
+
+    diff = _difference(args)
+    mq, y = cal.apply(diff, y=False)
+    if args.bin_width:
+        mq, y = cal.rebin(y, args.bin_width, args.mq_min, args.mq_max)
+    if args.y:
+        y = cal.apply_y(y)  # after binning, so the pressure offset counts once per bin
+    # same layout as the Calibration GUI's "Export Data"
+    if args.y and cal.y_mode == Y_PRESSURE:
+        hdr, fmt = 'm/q\tpressure (mbar)', ('%.6f', '%.9e')
+    elif args.y and cal.y_mode:
+        hdr, fmt = 'm/q\tnorm intensity', ('%.6f', '%.6f')
+    else:
+        hdr, fmt = 'm/q\tintensity', ('%.6f', '%.6f')
+    if is_binary_path(args.output):
+        meta = dict(cal.to_dict(), columns=hdr.split('\t'), bin_width=args.bin_width, **_folders_meta(args))
+        save_arrays(args.output, {'mq': mq, 'intensity': y}, meta)
+    else:
+        np.savetxt(args.output, np.vstack([mq, y]).T, delimiter='\t',
+                   header=hdr, comments='', fmt=fmt)
+    print(f"{args.output}: {len(diff)} samples, C={cal.C:.6g}, t0={cal.t0:.6g}")
+
+
+def cmd_pack(args):
+    out = pack(args.folder, args.output)
+    print(f"{out}: {len(list_data32_files(out))} files")
+
+
+def cmd_unpack(args):
+    unpack(args.archive, args.folder)
+    print(f"{args.folder}: {len(list_data32_files(args.folder))} files")
+
+
+def _add_sum_options(p):
+    p.add_argument('--workers', type=int, default=None,
+                   help='parallel readers (default: every core)')
+    p.add_argument('--backend', choices=['thread', 'process'], default='thread')
+    p.add_argument('--dtype', choices=sorted(_DTYPES), default='float64',
+                   help='accumulator; int64 gives exact sums, float32 saves memory')
+    p.add_argument('--cache', action='store_true', help='reuse sums from the on-disk cache')
+    p.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='massspec',
+                                     description='Batch processing of Acqiris .data32 recordings.')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('subtract', help='measurement minus background, one value per line')
+    p.add_argument('measurement')
+    p.add_argument('background')
+    p.add_argument('-o', '--output', required=True)
+    _add_sum_options(p)
+    p.set_defaults(func=cmd_subtract)
+
+    p = sub.add_parser('intensity', help='peak intensity over time as CSV')
+    p.add_argument('folder')
+    p.add_argument('-o', '--output', required=True)
+    p.add_argument('--x-min', type=int, default=0)
+    p.add_argument('--x-max', type=int, default=None)
+    p.add_argument('--skip', type=int, default=1)
+    p.add_argument('--windows', help='several x-windows, e.g. "100-200; 350-400"')
+    p.add_argument('--area', action='store_true', help='also write window areas')
+    p.add_argument('--workers', type=int, default=None)
+    p.set_defaults(func=cmd_intensity)
+
+    p = sub.add_parser('calibrate', help='calibrated m/q spectrum of measurement minus background')
+    p.add_argument('measurement')
+    p.add_argument('background')
+    p.add_argument('-o', '--output', required=True)
+    p.add_argument('--t1', type=float)
+    p.add_argument('--t2', type=float)
+    p.add_argument('--m1', type=float)
+    p.add_argument('--m2', type=float)
+    p.add_argument('--t', type=float, nargs='+', help='several reference times (least-squares fit)')
+    p.add_argument('--m', type=float, nargs='+', help='masses matching --t')
+    p.add_argument('--calibration', help='JSON file written by --save-calibration or the GUI')
+    p.add_argument('--y', action='store_true', help="apply the calibration file's Y-calibration")
+    p.add_argument('--bin-width', type=float, help='integrate into uniform m/q bins of this width')
+    p.add_argument('--mq-min', type=float, help='first bin edge (default: lowest m/q floored to the width)')
+    p.add_argument('--mq-max', type=float, help='last m/q to cover (default: highest m/q)')
+    p.add_argument('--save-calibration', help='write the calibration used to this JSON file')
+    _add_sum_options(p)
+    p.set_defaults(func=cmd_calibrate)
+
+    p = sub.add_parser('export', help='summed spectrum of each folder, one file per folder')
+    p.add_argument('folders', nargs='+')
+    p.add_argument('-o', '--output-dir', required=True)
+    # .h5 is only offered when the optional h5py is installed
+    exts = ['.txt'] + sorted(pattern[1:] for _, pattern in binary_filetypes())
+    p.add_argument('--ext', default='.txt', choices=exts, help='output format of each file')
+    _add_sum_options(p)
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser('pack', help='pack a folder into one memory-mappable archive')
+    p.add_argument('folder')
+    p.add_argument('-o', '--output', help=f'archive path (default: <folder>{ARCHIVE_EXT})')
+    p.set_defaults(func=cmd_pack)
+
+    p = sub.add_parser('unpack', help='restore the .data32 files of an archive')
+    p.add_argument('archive')
+    p.add_argument('folder')
+    p.set_defaults(func=cmd_unpack)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        args.func(args)
+    except (OSError, ValueError, ImportError) as e:
+        print(f"massspec {args.command}: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,36 +1,67 @@
-import os
 import numpy as np
+from .archive import is_archive
+from .dataset import Dataset
+from .decoder import decode_file
+from .summation import IncrementalSum, check_accumulator_dtype, parallel_sum_files
 
 class DataProcessor:
-    def __init__(self, folder_path, progress_callback=None, stop_event=None):
+    def __init__(self, folder_path, progress_callback=None, stop_event=None, dtype=np.float64,
+                 workers=1, backend='thread', cache=None, incremental=False):
         self.folder_path = folder_path
         self.progress_callback = progress_callback
         self.stop_event = stop_event  # Event to signal the thread to stop
+        self.dtype = check_accumulator_dtype(dtype)  # int64 exact, float64, or float32 to save memory
+        self.workers = workers  # None uses every core
+        self.backend = backend  # 'thread' or 'process'
+        self.cache = cache  # optional SumCache
+        # keep a running sum and only decode new/changed files on each call
+        # (archives are never appended to, so they are always summed in full)
+        self.running_sum = (IncrementalSum(folder_path, self.dtype)
+                            if incremental and not is_archive(folder_path) else None)
 
     def load_and_decode_file_to_decimal(self, file_path):
-        decoded_values = []
-        with open(file_path, 'rb') as file:
-            while not self.stop_event.is_set():  # Check if stop event is triggered
-                chunk = file.read(4)
-                if not chunk:
-                    break
-                decoded_values.append(int.from_bytes(chunk, byteorder='little'))
-        return decoded_values
+        return decode_file(file_path, self.stop_event)
 
     def calculate_summed_voltages(self):
-        all_decimal_values = []
-        files = [f for f in os.listdir(self.folder_path) if f.endswith(".data32")]
-
-        for i, filename in enumerate(files):
-            if self.stop_event.is_set():
+        if self.running_sum is not None:
+            if self.running_sum.refresh(self.progress_callback, self.stop_event) is None:
                 return []  # Exit if stop event is triggered
-            file_path = os.path.join(self.folder_path, filename)
-            decimal_values = self.load_and_decode_file_to_decimal(file_path)
-            all_decimal_values.append(decimal_values)
+            return self.to_voltages(self.running_sum.total.copy())  # the running total keeps growing
+
+        # a folder of files or a packed archive; sources are paths or archive rows
+        dataset = Dataset(self.folder_path)
+        paths = [dataset.source(f) for f in dataset.files]
+        # archive rows are views of one memory map: threads share it, processes would copy it
+        backend = 'thread' if dataset.archive else self.backend
+
+        fingerprinted = [self.folder_path] if dataset.archive else paths
+        key = self.cache.key(self.folder_path, fingerprinted, self.dtype) if self.cache else None
+        summed = self.cache.get(key) if key else None
+        if summed is not None:
             if self.progress_callback:
-                self.progress_callback(i + 1)
+                for i in range(len(paths)):
+                    self.progress_callback(i + 1)
+        else:
+            summed = parallel_sum_files(paths, self.dtype, self.progress_callback, self.stop_event,
+                                        workers=self.workers, backend=backend)
+            if summed is None:
+                return []  # Exit if stop event is triggered
+            if key:
+                try:
+                    self.cache.put(key, summed, self.folder_path)
+                except OSError as e:  # a full or read-only cache must not lose the sum
+                    print(f"Could not cache the sum of {self.folder_path}: {e}")
+
+        return self.to_voltages(summed)
+
+    def to_voltages(self, summed):
+        """
+        Scale a finished sum of raw counts by the ADC voltage step.
 
-        matrix = np.array(all_decimal_values, dtype=np.float64)
+        Applied once to the summed trace instead of to every sample; with a
+        step of 1 the sum is returned untouched, so int64 sums stay exact.
+        """
         voltage_step = 1  # Change if required
-        summed_voltages = np.sum(matrix * voltage_step, axis=0)
-        return summed_voltages
+        if voltage_step != 1:
+            summed = summed * voltage_step
+        return summed
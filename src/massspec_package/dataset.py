@@ -0,0 +1,151 @@
+import os
+import re
+import time
+import threading
+import numpy as np
+from .archive import Archive, is_archive
+from .decoder import DATA32_DTYPE
+
+
+def natural_key(fname):
+    """Sort key putting 'file2' before 'file10'."""
+    parts = re.split(r'(\d+)', fname)
+    return [int(p) if p.isdigit() else p.lower() for p in parts]
+
+
+# A directory modified this recently may change again within the same
+# mtime tick, so its listing is not trusted until it is older than this.
+_RACY_NS = 2_000_000_000
+
+
+class FolderIndex:
+    """
+    Cached listing of the .data32 files in one folder.
+
+    The folder is scanned once with ``os.scandir``; names are kept in natural
+    order together with each file's size and mtime. Later calls only stat
+    the directory and rescan when its mtime changed, i.e. when files were
+    added, removed or renamed. Rewriting a file in place does not touch the
+    directory, so sizes and mtimes are those of the last scan.
+    """
+    def __init__(self, folder_path):
+        self.folder_path = folder_path
+        self.files = []
+        self.sizes = {}   # name -> bytes
+        self.mtimes = {}  # name -> st_mtime_ns
+        self._dir_mtime = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Rescan if the directory changed since the last scan; returns self."""
+        with self._lock:
+            mtime = os.stat(self.folder_path).st_mtime_ns
+            if mtime != self._dir_mtime:
+                sizes, mtimes = {}, {}
+                with os.scandir(self.folder_path) as it:
+                    for entry in it:
+                        if entry.name.endswith('.data32') and entry.is_file():
+                            st = entry.stat()
+                            sizes[entry.name] = st.st_size
+                            mtimes[entry.name] = st.st_mtime_ns
+                self.files = sorted(sizes, key=natural_key)
+                self.sizes, self.mtimes = sizes, mtimes
+                racy = time.time_ns() - mtime < _RACY_NS
+                self._dir_mtime = None if racy else mtime
+        return self
+
+    def __len__(self):
+        return len(self.refresh().files)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def folder_index(folder_path):
+    """The shared, up-to-date ``FolderIndex`` of ``folder_path``."""
+    key = os.path.abspath(folder_path)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = FolderIndex(folder_path)
+    return index.refresh()
+
+
+def list_data32_files(folder_path):
+    """
+    Names of the .data32 files in ``folder_path`` in natural (human) order.
+
+    Served from the shared folder index. For a packed archive these are the
+    archived names in their packed order.
+    """
+    if not folder_path:
+        return []
+    if is_archive(folder_path):
+        return list(Archive(folder_path).files)
+    return list(folder_index(folder_path).files)
+
+
+def map_file(file_path):
+    """
+    Memory-map a .data32 file as a read-only little-endian uint32 array.
+
+    Nothing is read until the returned view is accessed, and slicing it only
+    touches the pages covering the slice. A trailing partial sample is
+    ignored. An already mapped array (an archive row) is returned as is.
+    """
+    if isinstance(file_path, np.ndarray):
+        return file_path
+    n = os.path.getsize(file_path) // DATA32_DTYPE.itemsize
+    if n == 0:
+        return np.zeros(0, dtype=DATA32_DTYPE)  # mmap can't map empty files
+    return np.asarray(np.memmap(file_path, dtype=DATA32_DTYPE, mode='r', shape=(n,)))
+
+
+class Dataset:
+    """
+    A measurement folder of .data32 files with zero-copy access.
+
+    Files are listed once in natural order (or taken from ``files``) and each
+    file is memory-mapped when it is accessed, so every consumer shares the
+    page cache instead of holding a private copy. ``folder_path`` may also be
+    a packed archive; files are then rows of its single memory map.
+    """
+    def __init__(self, folder_path, files=None):
+        self.folder_path = folder_path
+        self.archive = Archive(folder_path) if is_archive(folder_path) else None
+        if files is not None:
+            self.files = list(files)
+        else:
+            self.files = list(self.archive.files) if self.archive else list_data32_files(folder_path)
+
+    def __len__(self):
+        return len(self.files)
+
+    def __iter__(self):
+        for i in range(len(self.files)):
+            yield self[i]
+
+    def path(self, key):
+        """Full path of a file given its position or name."""
+        name = self.files[key] if isinstance(key, (int, np.integer)) else key
+        return os.path.join(self.folder_path, name)
+
+    def source(self, key):
+        """
+        What the readers take for a file: its path, or its row for an archive.
+
+        ``decode_file``, ``read_window`` and ``map_file`` accept either.
+        """
+        if self.archive is None:
+            return self.path(key)
+        name = self.files[key] if isinstance(key, (int, np.integer)) else key
+        return self.archive[name]
+
+    def __getitem__(self, key):
+        """uint32 view of a file given its position or name."""
+        return map_file(self.source(key))
+
+    def window(self, key, start=0, stop=None):
+        """View of samples ``start:stop`` of a file; only those pages are read."""
+        return self[key][start:stop]
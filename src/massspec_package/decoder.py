@@ -0,0 +1,55 @@
+import os
+import numpy as np
+
+# Acqiris .data32 files are a flat stream of little-endian 32-bit samples.
+DATA32_DTYPE = np.dtype('<u4')
+
+# Samples read per block; the stop event is checked between blocks.
+BLOCK_SAMPLES = 1 << 20  # 4 MiB
+
+
+def decode_file(file_path, stop_event=None, block_samples=BLOCK_SAMPLES):
+    """
+    Decode a .data32 file into a little-endian uint32 array.
+
+    The file is read in blocks of ``block_samples`` straight into the output
+    buffer. If ``stop_event`` is set between two blocks, the samples decoded
+    so far are returned. A trailing partial sample (file size not a multiple
+    of 4) is zero-padded, like ``int.from_bytes`` on a short chunk.
+    An already mapped array (an archive row) is returned as is.
+    """
+    if isinstance(file_path, np.ndarray):
+        return file_path
+    size = os.path.getsize(file_path)
+    n_full, tail = divmod(size, DATA32_DTYPE.itemsize)
+    out = np.zeros(n_full + (1 if tail else 0), dtype=DATA32_DTYPE)
+    raw = out.view(np.uint8)
+
+    pos = 0
+    with open(file_path, 'rb') as f:
+        while pos < size:
+            if stop_event is not None and stop_event.is_set():
+                break
+            count = min(block_samples * DATA32_DTYPE.itemsize, size - pos)
+            got = f.readinto(raw[pos:pos + count])
+            if not got:
+                break  # file shrank while reading
+            pos += got
+    return out[:-(-pos // DATA32_DTYPE.itemsize)]
+
+
+def read_window(file_path, start=0, stop=None):
+    """
+    Read samples ``start:stop`` of a .data32 file with a single seek.
+
+    ``start`` and ``stop`` follow slice semantics; only the bytes
+    ``[4*start, 4*stop)`` are read from disk. An already mapped array (an
+    archive row) is sliced instead.
+    """
+    if isinstance(file_path, np.ndarray):
+        return file_path[start:stop]
+    n = os.path.getsize(file_path) // DATA32_DTYPE.itemsize
+    window = range(n)[start:stop]
+    with open(file_path, 'rb') as f:
+        f.seek(window.start * DATA32_DTYPE.itemsize)
+        return np.fromfile(f, dtype=DATA32_DTYPE, count=len(window))
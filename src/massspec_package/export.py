@@ -0,0 +1,147 @@
+import os
+import json
+import importlib.util
+import numpy as np
+
+# Values formatted per block; bounds the temporary strings to a few hundred MB.
+CHUNK_ROWS = 1 << 18
+
+
+def _is_integral(values):
+    # whole floats below 1e16 print as "<int>.0"; -0.0 keeps its sign
+    with np.errstate(invalid='ignore'):
+        return (np.all(np.abs(values) < 1e16) and np.all(values == np.round(values))
+                and not np.any(np.signbit(values) & (values == 0)))
+
+
+def _strings(values):
+    """The text ``f"{v}"`` gives for every element of ``values``."""
+    if values.dtype.kind == 'f' and _is_integral(values):
+        # summed spectra are whole numbers; int formatting is several times faster
+        return [s + '.0' for s in map(str, values.astype(np.int64).tolist())]
+    # f"{v}" formats numpy scalars like the Python scalars tolist() returns
+    return list(map(str, values.tolist()))
+
+
+def write_values(path, values, chunk_rows=CHUNK_ROWS):
+    """
+    Write one value per line, byte-identical to ``f.write(f"{v}\\n")`` per value.
+
+    Values are formatted and written a block of ``chunk_rows`` at a time.
+    """
+    values = np.asarray(values)
+    with open(path, 'w') as f:
+        for start in range(0, len(values), chunk_rows):
+            chunk = values[start:start + chunk_rows]
+            if chunk.dtype.kind == 'f' and _is_integral(chunk):
+                f.write('.0\n'.join(map(str, chunk.astype(np.int64).tolist())) + '.0\n')
+            else:
+                f.write('\n'.join(_strings(chunk)) + '\n')
+
+
+def write_columns(path, header, columns, chunk_rows=CHUNK_ROWS, sep=','):
+    """
+    Write columns of possibly unequal length side by side as CSV.
+
+    ``header`` is a list of column names (``None`` for no header line).
+    Shorter columns are padded with empty fields, as in the single-waveform
+    export. Each block of rows is formatted column-wise and joined in one go.
+    Arrays are formatted by dtype; lists keep their element types, so a list
+    of integer maxima with NaN for unreadable files prints ``987`` and ``nan``
+    just like ``f"{v}"``, not ``987.0``.
+    """
+    columns = [c if isinstance(c, np.ndarray) else np.array(c, dtype=object) for c in columns]
+    n_rows = max((len(c) for c in columns), default=0)
+    with open(path, 'w') as f:
+        if header is not None:
+            f.write(sep.join(header) + '\n')
+        for start in range(0, n_rows, chunk_rows):
+            stop = min(start + chunk_rows, n_rows)
+            cols = []
+            for c in columns:
+                strs = _strings(c[start:stop])
+                cols.append(strs + [''] * (stop - start - len(strs)))
+            f.write('\n'.join(map(sep.join, zip(*cols))) + '\n')
+
+
+BINARY_EXTENSIONS = ('.npy', '.npz', '.h5', '.hdf5')
+
+
+def _h5py():
+    # optional dependency, imported only when an HDF5 file is used
+    try:
+        import h5py
+    except ImportError:
+        raise ImportError('HDF5 export needs the optional h5py package') from None
+    return h5py
+
+
+def binary_filetypes():
+    """``filetypes`` entries for the binary formats available here."""
+    types = [('NumPy archive', '*.npz'), ('NumPy array', '*.npy')]
+    if importlib.util.find_spec('h5py') is not None:
+        types.append(('HDF5', '*.h5'))
+    return types
+
+
+def is_binary_path(path):
+    return os.path.splitext(str(path))[1].lower() in BINARY_EXTENSIONS
+
+
+def _jsonable(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def save_arrays(path, arrays, metadata=None):
+    """
+    Save named arrays plus a metadata dict, chosen by the file extension.
+
+    ``.npz`` stores every array and the metadata as a JSON string under
+    ``metadata``. ``.npy`` holds a single array; its metadata goes to
+    ``<path>.json`` next to it. ``.h5``/``.hdf5`` (needs h5py) writes one
+    chunked, gzip-compressed dataset per array with the metadata as JSON in
+    the file attributes.
+    """
+    ext = os.path.splitext(str(path))[1].lower()
+    meta = json.dumps(metadata or {}, default=_jsonable)
+    if ext == '.npz':
+        np.savez(path, metadata=np.array(meta), **arrays)
+    elif ext == '.npy':
+        if len(arrays) != 1:
+            raise ValueError('.npy holds a single array; use .npz for several')
+        np.save(path, np.asarray(next(iter(arrays.values()))))
+        with open(str(path) + '.json', 'w') as f:
+            f.write(meta)
+    elif ext in ('.h5', '.hdf5'):
+        with _h5py().File(path, 'w') as f:
+            for name, arr in arrays.items():
+                arr = np.asarray(arr)
+                opts = dict(chunks=True, compression='gzip') if arr.size > 1 else {}
+                f.create_dataset(name, data=arr, **opts)
+            f.attrs['metadata'] = meta
+    else:
+        raise ValueError(f"Unsupported binary format: {ext or path}")
+
+
+def load_arrays(path):
+    """Inverse of ``save_arrays``: ``(arrays, metadata)``."""
+    ext = os.path.splitext(str(path))[1].lower()
+    if ext == '.npz':
+        with np.load(path) as f:
+            arrays = {k: f[k] for k in f.files}
+        meta = str(arrays.pop('metadata', '{}'))
+    elif ext == '.npy':
+        arrays = {os.path.splitext(os.path.basename(str(path)))[0]: np.load(path)}
+        meta_path = str(path) + '.json'
+        meta = open(meta_path).read() if os.path.exists(meta_path) else '{}'
+    elif ext in ('.h5', '.hdf5'):
+        with _h5py().File(path, 'r') as f:
+            arrays = {k: f[k][()] for k in f.keys()}
+            meta = f.attrs.get('metadata', '{}')
+    else:
+        raise ValueError(f"Unsupported binary format: {ext or path}")
+    return arrays, json.loads(meta)
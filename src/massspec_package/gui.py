@@ -2,19 +2,20 @@
 
 import os
 import json
-import threading
 import tkinter as tk
 import tkinter.font as tkfont
 from tkinter import ttk, filedialog, messagebox
 
-import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-
 from PIL import Image, ImageTk
 
+from .cache import DEFAULT_CACHE_DIR, SumCache
 from .data_processor import DataProcessor
+from .dataset import list_data32_files
+from .export import binary_filetypes, is_binary_path, save_arrays, write_values
+from .jobs import BackgroundJob
+from .plotting import DecimatedLine, PlotPanel
 from .voltage_plotter import VoltagePlotter
+from .watcher import FolderWatcher
 
 # paths to assets/settings
 _LOGO_PATH = os.path.join(os.path.dirname(__file__), 'assets', 'logo.png')
@@ -37,6 +38,7 @@ class App:
             except Exception:
                 pass
         self.ui_scale = float(self.cfg.get('ui_scale', 1.0))
+        self.sum_cache = SumCache(self.cfg.get('cache_dir', DEFAULT_CACHE_DIR))
 
         # Initialize state vars
         self.measurement_folder = (
@@ -51,10 +53,19 @@ class App:
         )
         self.data_processed = False
         self.total_files = 0
+        self.file_counts = (0, 0)  # (measurement, background) .data32 files
         self.processed_files = 0
-        self.stop_event = threading.Event()
+        self.job = None  # BackgroundJob doing the folder processing
+
+        # Live watch mode: poll interval (s) and plot refresh cap (frames/s)
+        self.watch_job = None
+        self.watch_interval = float(self.cfg.get('watch_interval', 1.0))
+        self.sum_dtype = self.cfg.get('sum_dtype', 'float64')  # 'int64', 'float64' or 'float32'
+        self.watch_max_fps = float(self.cfg.get('watch_max_fps', 2.0))
 
-        # Placeholders for plot canvas and toolbar
+        # Placeholders for plot panel, canvas and toolbar
+        self.plot_panel = None
+        self.plot_line = None
         self.plot_canvas = None
         self.toolbar = None
 
@@ -163,6 +174,10 @@ class App:
                                          text='Process and Plot',
                                          command=self.start_processing)
         self.process_button.grid(row=0, column=0, padx=5)
+        self.watch_button = ttk.Button(btnf,
+                                       text='Watch Live',
+                                       command=self.toggle_watch)
+        self.watch_button.grid(row=0, column=1, padx=5)
         # "Plot Only" button removed
 
         self._toggle_process_button()
@@ -254,19 +269,23 @@ class App:
             self._toggle_process_button()
 
     def _toggle_process_button(self):
-        state = 'normal' if self.measurement_folder and self.background_folder else 'disabled'
-        self.process_button.config(state=state)
+        # processing and watching exclude each other; the running one stays usable
+        ready = bool(self.measurement_folder and self.background_folder)
+        self.process_button.config(state='normal' if ready and not self.watch_job else 'disabled')
+        self.watch_button.config(state='normal' if (ready and not self.job) or self.watch_job else 'disabled')
 
     def count_total_files(self):
-        meas = len([f for f in os.listdir(self.measurement_folder) if f.endswith('.data32')])
-        back = len([f for f in os.listdir(self.background_folder) if f.endswith('.data32')])
+        # served from the shared folder index, which the summation reuses
+        meas = len(list_data32_files(self.measurement_folder))
+        back = len(list_data32_files(self.background_folder))
+        self.file_counts = (meas, back)
         self.total_files = meas + back
         self.processed_files = 0
 
-    def update_progress(self, _):
-        self.processed_files += 1
+    def update_progress(self, done):
+        # runs on the Tk thread; done counts files of both folders
+        self.processed_files = done
         self.progress['value'] = (self.processed_files / self.total_files) * 100
-        self.root.update_idletasks()
 
     def start_processing(self):
         if not (self.measurement_folder and self.background_folder):
@@ -277,46 +296,107 @@ class App:
         # Removed disabling of plot-only button
         self.save_button.config(state='disabled')
         self.data_processed = False
-        self.stop_event.clear()
-        threading.Thread(target=self._process_and_prepare, daemon=True).start()
+        if self.job:
+            self.job.cancel()
+        self.job = BackgroundJob(self.root, self._process_and_prepare,
+                                 on_progress=self.update_progress,
+                                 on_done=self._on_processed,
+                                 on_error=self._on_process_error).start()
+        self._toggle_process_button()
 
-    def _process_and_prepare(self):
-        meas = DataProcessor(self.measurement_folder, self.update_progress, self.stop_event)
-        back = DataProcessor(self.background_folder, self.update_progress, self.stop_event)
+    def _process_and_prepare(self, job):
+        # worker thread: no Tk calls here
+        meas = DataProcessor(self.measurement_folder, job.step, job.stop_event, dtype=self.sum_dtype,
+                             workers=os.cpu_count(), cache=self.sum_cache)
+        back = DataProcessor(self.background_folder, job.step, job.stop_event, dtype=self.sum_dtype,
+                             workers=os.cpu_count(), cache=self.sum_cache)
         vp = VoltagePlotter(meas, back)
-        vp.calculate_difference()
-        self.difference = vp.difference
+        vp.calculate_difference(concurrent=True)
+        return vp.difference
+
+    def _on_process_error(self, e):
+        self.job = None
+        self._toggle_process_button()
+        messagebox.showerror('Error', str(e))
+
+    def _on_processed(self, difference):
+        self.job = None
+        self._toggle_process_button()
+        self.difference = difference
         self.data_processed = True
         # Removed re-enabling of plot-only button
-        self.root.after(0, lambda: self.save_button.config(state='normal'))
-        self.root.after(0, lambda: self.notebook.select(self.tab_plot))
-        self.root.after(0, self._embed_plot)
+        self.save_button.config(state='normal')
+        self.notebook.select(self.tab_plot)
+        self._embed_plot()
 
     def _embed_plot(self):
         if not self.data_processed:
             return
-        # Clear previous toolbar and canvas
-        for child in self.plot_container.winfo_children():
-            child.destroy()
-
-        # Create figure & axes
-        fig, ax = plt.subplots(figsize=(3, 2))
-        ax.plot(np.arange(len(self.difference)), self.difference)
+        # Canvas and toolbar are created once and reused for every plot
+        if self.plot_panel is None:
+            self.plot_panel = PlotPanel(self.plot_container, figsize=(3, 2))
+            self.plot_canvas, self.toolbar = self.plot_panel.canvas, self.plot_panel.toolbar
+
+        ax = self.plot_panel.axes()
+        self.plot_ax = ax
+        self.plot_line = DecimatedLine(ax, None, self.difference)
         ax.set_xlabel('Index')
         ax.set_ylabel('Intensity')
         ax.grid(True)
+        self.plot_panel.draw()
 
-        # Instantiate canvas
-        self.plot_canvas = FigureCanvasTkAgg(fig, master=self.plot_container)
+    def toggle_watch(self):
+        if self.watch_job:
+            self._stop_watch()
+            return
+        if not (self.measurement_folder and self.background_folder):
+            messagebox.showwarning('Folders Not Selected', 'Please select both folders first.')
+            return
+        self.watch_button.config(text='Stop Watching')
+        self.save_button.config(state='disabled')
+        self.plot_line = None
+        # polling the job at the frame-rate cap redraws at most that often,
+        # with only the newest spectrum if several arrived in between
+        self.watch_job = BackgroundJob(self.root, self._watch_loop,
+                                       on_progress=self._show_live,
+                                       on_error=self._on_watch_error,
+                                       poll_ms=int(1000 / self.watch_max_fps)).start()
+        self._toggle_process_button()
 
-        # Add interactive toolbar above canvas
-        self.toolbar = NavigationToolbar2Tk(self.plot_canvas, self.plot_container)
-        self.toolbar.update()
-        self.toolbar.pack(side='top', fill='x')
+    def _stop_watch(self):
+        self.watch_job.cancel()
+        self.watch_job = None
+        self.watch_button.config(text='Watch Live')
+        self._toggle_process_button()
 
-        # Pack canvas below toolbar
-        self.plot_canvas.draw()
-        self.plot_canvas.get_tk_widget().pack(fill='both', expand=True)
+    def _on_watch_error(self, e):
+        self._stop_watch()
+        messagebox.showerror('Error', str(e))
+
+    def _watch_loop(self, job):
+        # The background is static: sum it once, then follow the measurement folder
+        back = DataProcessor(self.background_folder, stop_event=job.stop_event,
+                             workers=os.cpu_count(), cache=self.sum_cache).calculate_summed_voltages()
+        watcher = FolderWatcher(self.measurement_folder)
+        while not job.stop_event.is_set():
+            if watcher.poll(job.stop_event) and watcher.total.size:
+                if len(back) and watcher.total.size != len(back):
+                    raise ValueError(f"Measurement spectra have {watcher.total.size} samples, "
+                                     f"the background has {len(back)}")
+                if watcher.total.size == len(back):
+                    job.report(watcher.total - back)
+            job.stop_event.wait(self.watch_interval)
+
+    def _show_live(self, difference):
+        self.difference = difference
+        self.data_processed = True
+        if self.plot_line is not None:
+            self.plot_line.set_data(None, self.difference)
+            self.plot_canvas.draw_idle()
+        else:
+            self._embed_plot()
+            self.notebook.select(self.tab_plot)
+        self.save_button.config(state='normal')
 
     def save_data(self):
         if not self.data_processed:
@@ -324,20 +404,28 @@ class App:
             return
         fpath = filedialog.asksaveasfilename(
             defaultextension='.txt',
-            filetypes=[('Text Files', '*.txt'), ('CSV Files', '*.csv')]
+            filetypes=[('Text Files', '*.txt'), ('CSV Files', '*.csv')] + binary_filetypes()
         )
         if not fpath:
             return
         try:
-            with open(fpath, 'w') as f:
-                for v in self.difference:
-                    f.write(f"{v}\n")
+            if is_binary_path(fpath):
+                save_arrays(fpath, {'difference': self.difference}, {
+                    'measurement_folder': self.measurement_folder,
+                    'background_folder': self.background_folder,
+                    'measurement_files': self.file_counts[0],
+                    'background_files': self.file_counts[1],
+                })
+            else:
+                write_values(fpath, self.difference)
             messagebox.showinfo('Saved', f'Data saved to:\n{fpath}')
         except Exception as e:
             messagebox.showerror('Error', str(e))
 
     def on_closing(self):
-        self.stop_event.set()
+        for job in (self.job, self.watch_job):
+            if job:
+                job.cancel()
         try:
             with open(_SETTINGS_PATH, 'w') as f:
                 json.dump(self.cfg, f)
@@ -0,0 +1,134 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from .decoder import read_window
+
+
+def window_max(file_path, x_min=0, x_max=None):
+    """Max sample inside ``x_min:x_max`` of one file (NaN if unreadable or empty)."""
+    try:
+        values = read_window(file_path, x_min, x_max or None)
+    except OSError as e:
+        print(f"Error reading {file_path}: {e}")
+        return np.nan
+    return values.max() if values.size else np.nan
+
+
+def intensity_series(file_paths, x_min=0, x_max=None, workers=None, progress_callback=None,
+                     stop_event=None):
+    """
+    Peak intensity inside ``x_min:x_max`` for each file, in the given order.
+
+    Only the window's byte range of each file is read and files are spread
+    over a thread pool (``workers`` defaults to the CPU count).
+    ``progress_callback`` is called with the number of files done. Returns
+    None if ``stop_event`` is set; files not started yet are skipped.
+    """
+    workers = workers or os.cpu_count() or 1
+    vals = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(window_max, path, x_min, x_max) for path in file_paths]
+        try:
+            for i, future in enumerate(futures, start=1):
+                value = future.result()
+                if stop_event is not None and stop_event.is_set():
+                    return None
+                vals.append(value)
+                if progress_callback:
+                    progress_callback(i)
+        finally:
+            for future in futures:
+                future.cancel()
+    return vals
+
+
+def parse_windows(text):
+    """Parse ``"100-200; 350-400"`` into ``[(100, 200), (350, 400)]``."""
+    windows = []
+    for part in text.replace(',', ';').split(';'):
+        if not part.strip():
+            continue
+        lo, hi = part.split('-')
+        windows.append((int(lo), int(hi)))
+    return windows
+
+
+def window_stats(file_path, windows, area=False):
+    """
+    Max (and optionally integrated area) of several x-windows of one file.
+
+    The range covering all windows is read once; maxima come from a single
+    ``np.maximum.reduceat`` over the window edges and areas from a cumulative
+    sum, so the cost barely grows with the number of windows. Returns
+    ``(maxes, areas)`` as float arrays (``areas`` is None unless requested);
+    empty windows and unreadable files give NaN.
+    """
+    maxes = np.full(len(windows), np.nan)
+    areas = np.full(len(windows), np.nan) if area else None
+    try:
+        n = len(file_path) if isinstance(file_path, np.ndarray) else os.path.getsize(file_path) // 4
+        bounds = np.array([[min(max(lo or 0, 0), n), n if not hi else min(max(hi, 0), n)]
+                           for lo, hi in windows], dtype=np.int64).reshape(-1, 2)
+        start = int(bounds.min()) if bounds.size else 0
+        values = read_window(file_path, start, int(bounds.max()) if bounds.size else 0)
+    except OSError as e:
+        print(f"Error reading {file_path}: {e}")
+        return maxes, areas
+
+    starts, stops = bounds[:, 0] - start, bounds[:, 1] - start
+    stops = np.minimum(stops, values.size)  # file shrank while reading
+    valid = stops > starts
+    if values.size and valid.any():
+        edges = np.unique(np.concatenate([starts, stops]))
+        edges = edges[edges < values.size]
+        seg_max = np.maximum.reduceat(values, edges)
+        first = np.searchsorted(edges, starts)
+        last = np.searchsorted(edges, stops)
+        for k in np.flatnonzero(valid):
+            maxes[k] = seg_max[first[k]:last[k]].max()
+    if area:
+        csum = np.concatenate([[0], np.cumsum(values, dtype=np.int64)])
+        areas[valid] = csum[stops[valid]] - csum[starts[valid]]
+    return maxes, areas
+
+
+def window_series(file_paths, windows, area=False, workers=None, progress_callback=None,
+                  stop_event=None):
+    """
+    Window maxima (and areas) for each file: arrays of shape (n_files, n_windows).
+
+    Files are read once each on a thread pool, in the given order. Returns
+    None if ``stop_event`` is set, like ``intensity_series``.
+    """
+    workers = workers or os.cpu_count() or 1
+    maxes = np.full((len(file_paths), len(windows)), np.nan)
+    areas = np.full((len(file_paths), len(windows)), np.nan) if area else None
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(window_stats, path, windows, area) for path in file_paths]
+        try:
+            for i, future in enumerate(futures):
+                m, a = future.result()
+                if stop_event is not None and stop_event.is_set():
+                    return None
+                maxes[i] = m
+                if area:
+                    areas[i] = a
+                if progress_callback:
+                    progress_callback(i + 1)
+        finally:
+            for future in futures:
+                future.cancel()
+    return maxes, areas
+
+
+def write_window_csv(fpath, xs, windows, maxes, areas=None):
+    """Write window series as one wide CSV: Index, Max_<lo>_<hi>..., Area_<lo>_<hi>..."""
+    header = ['Index'] + [f'Max_{lo}_{hi}' for lo, hi in windows]
+    columns = [np.asarray(xs, dtype=np.float64)[:, None], maxes]
+    if areas is not None:
+        header += [f'Area_{lo}_{hi}' for lo, hi in windows]
+        columns.append(areas)
+    table = np.hstack(columns)
+    fmt = ['%d'] + ['%.15g'] * (table.shape[1] - 1)
+    np.savetxt(fpath, table, delimiter=',', header=','.join(header), comments='', fmt=fmt)
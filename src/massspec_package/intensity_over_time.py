@@ -1,17 +1,21 @@
 # intensity_over_time.py
 
 import os
-import re
 import json
 import numpy as np
-import matplotlib.pyplot as plt
 import tkinter as tk
 import tkinter.font as tkfont
 from tkinter import ttk, filedialog, messagebox
 
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 from PIL import Image, ImageTk
 
+from .archive import ARCHIVE_EXT
+from .dataset import Dataset, list_data32_files, map_file
+from .export import binary_filetypes, is_binary_path, save_arrays, write_columns
+from .intensity import intensity_series, parse_windows, window_series, write_window_csv
+from .jobs import BackgroundJob
+from .plotting import DecimatedLine, PlotPanel
+
 # compatibility for Pillow <10 and >=10
 try:
     resample_filter = Image.Resampling.LANCZOS
@@ -24,26 +28,21 @@ _SETTINGS_PATH = os.path.join(os.path.dirname(__file__), 'settings.json')
 
 class DataProcessor:
     """
-    Load .data32 files sorted in natural (human) order.
+    Load .data32 files sorted in natural (human) order, from a folder or a
+    packed archive.
     """
     def __init__(self, folder_path):
         self.folder_path = folder_path
 
     def load_file(self, file_path):
         try:
-            return np.fromfile(file_path, dtype=np.uint32)
+            return map_file(file_path)
         except Exception as e:
             print(f"Error reading {file_path}: {e}")
             return np.array([])
 
     def get_files(self):
-        if not self.folder_path:
-            return []
-        raw = [f for f in os.listdir(self.folder_path) if f.endswith(".data32")]
-        def natural_key(fname):
-            parts = re.split(r'(\d+)', fname)
-            return [int(p) if p.isdigit() else p.lower() for p in parts]
-        return sorted(raw, key=natural_key)
+        return list_data32_files(self.folder_path)
 
 class VoltagePlotter:
     def __init__(self, processor):
@@ -51,39 +50,92 @@ class VoltagePlotter:
         self.x_min = 0
         self.x_max = None
         self.skip = 1
-
-    def set_params(self, x_min, x_max, skip):
+        self.windows = []
+        self.area = False
+        # (folder, x_min, x_max, skip, files) -> (xs, vals), most recent last
+        self._results = {}
+        self.max_cached_results = 16
+        self.workers = None  # reader threads; None uses every core
+
+    def set_params(self, x_min, x_max, skip, windows=None, area=False):
         self.x_min = x_min
         self.x_max = x_max
         self.skip = max(1, skip)
+        self.windows = list(windows or [])  # (x_min, x_max) pairs tracked in one pass
+        self.area = area
+
+    def _cached(self, key, compute):
+        if key in self._results:
+            self._results[key] = self._results.pop(key)  # mark as most recent
+            return self._results[key]
+        result = compute()
+        if result is None:  # cancelled; nothing to keep
+            return None
+        self._results[key] = result
+        while len(self._results) > self.max_cached_results:
+            self._results.pop(next(iter(self._results)))
+        return result
 
     def get_first_data(self):
         files = self.processor.get_files()
         if not files:
             return None, None
-        path = os.path.join(self.processor.folder_path, files[0])
-        data = self.processor.load_file(path)
+        dataset = Dataset(self.processor.folder_path, files[:1])
+        data = self.processor.load_file(dataset.source(0))
         return files[0], data
 
-    def get_intensity_over_time(self, progress_callback=None):
+    def get_intensity_over_time(self, progress_callback=None, stop_event=None):
+        """
+        Max value inside the x-window for every ``skip``-th file.
+
+        Results are cached per folder, window, skip and file list, so plotting,
+        saving and re-plotting with unchanged parameters read the files once.
+        Returns None if ``stop_event`` is set before all files are read.
+        """
         files = self.processor.get_files()[::self.skip]
-        xs, vals = [], []
-        for i, fname in enumerate(files, start=1):
-            arr = self.processor.load_file(os.path.join(self.processor.folder_path, fname))
-            if arr.size:
-                end = self.x_max if self.x_max and self.x_max < arr.size else arr.size
-                vals.append(np.max(arr[self.x_min:end]))
-            else:
-                vals.append(np.nan)
-            xs.append(i)
-            if progress_callback:
-                progress_callback(i)
-        return xs, vals
+        key = (self.processor.folder_path, self.x_min, self.x_max, self.skip, tuple(files))
+
+        def compute():
+            dataset = Dataset(self.processor.folder_path, files)
+            paths = [dataset.source(fname) for fname in dataset.files]
+            vals = intensity_series(paths, self.x_min, self.x_max, self.workers,
+                                    progress_callback, stop_event)
+            if vals is None:
+                return None
+            return list(range(1, len(vals) + 1)), vals
+        return self._cached(key, compute)
+
+    def get_window_intensities(self, progress_callback=None, stop_event=None):
+        """
+        Max (and area, if ``self.area``) of every window in ``self.windows``.
+
+        All windows are evaluated in one read per file. Returns
+        ``(xs, maxes, areas)`` with arrays of shape (n_files, n_windows);
+        cached like ``get_intensity_over_time``.
+        """
+        files = self.processor.get_files()[::self.skip]
+        key = (self.processor.folder_path, tuple(self.windows), self.area, self.skip, tuple(files))
+
+        def compute():
+            dataset = Dataset(self.processor.folder_path, files)
+            paths = [dataset.source(fname) for fname in dataset.files]
+            series = window_series(paths, self.windows, self.area, self.workers,
+                                   progress_callback, stop_event)
+            if series is None:
+                return None
+            return (list(range(1, len(paths) + 1)),) + series
+        return self._cached(key, compute)
 
 class App:
     def __init__(self, root):
         self.root = root
         self.preview_after_id = None  # for debouncing preview updates
+        # plot panels are created on first use and reused afterwards
+        self.preview_panel = None
+        self.intensity_panel = None
+        self._preview_ax = self._preview_drawn = None
+        self.job = None  # background intensity computation
+        self.plotted = None  # (windows, result, metadata) of the series on screen
 
         # base (unscaled) window size
         self.base_w = 800
@@ -142,6 +194,10 @@ class App:
 
     def _build_menu(self):
         menubar = tk.Menu(self.root)
+        filem = tk.Menu(menubar, tearoff=0)
+        filem.add_command(label='Open Folder...', command=self.select_folder)
+        filem.add_command(label='Open Archive...', command=self.select_archive)
+        menubar.add_cascade(label='File', menu=filem)
         settingsm = tk.Menu(menubar, tearoff=0)
         settingsm.add_command(label='Scale...', command=self.open_scale_dialog)
         menubar.add_cascade(label='Settings', menu=settingsm)
@@ -214,12 +270,20 @@ class App:
 
         ttk.Button(frame, text="Proceed", command=self.proceed).grid(row=1, column=3, padx=5)
 
+        # several windows at once, e.g. "100-200; 350-400" (overrides X Min/X Max)
+        ttk.Label(frame, text="Windows:").grid(row=2, column=0)
+        self.entry_windows = ttk.Entry(frame, width=30)
+        self.entry_windows.grid(row=2, column=1, columnspan=2, padx=5, sticky='w')
+        self.area_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame, text="Integrated area", variable=self.area_var).grid(row=2, column=3, padx=5)
+
         self.canvas1_frame = ttk.Frame(self.tab_params)
         self.canvas1_frame.pack(fill='both', expand=True)
 
         # debounce live preview updates with 0.5s delay
         self.entry_min.bind("<KeyRelease>", self.schedule_preview)
         self.entry_max.bind("<KeyRelease>", self.schedule_preview)
+        self.entry_windows.bind("<KeyRelease>", self.schedule_preview)
 
     def _build_intensity_tab(self):
         self.progress = ttk.Progressbar(self.tab_intensity, orient='horizontal', mode='determinate')
@@ -235,10 +299,20 @@ class App:
         self.canvas2_frame = ttk.Frame(self.tab_intensity)
         self.canvas2_frame.pack(fill='both', expand=True)
 
-    def select_folder(self):
-        path = filedialog.askdirectory()
+    def select_archive(self):
+        path = filedialog.askopenfilename(filetypes=[('Packed archive', '*' + ARCHIVE_EXT)])
+        if path:
+            self.select_folder(path)
+
+    def select_folder(self, path=None):
+        path = path or filedialog.askdirectory()
         if not path:
             return
+        # a series still being read belongs to the old folder
+        if self.job:
+            self.job.cancel()
+            self.job = None
+            self.progress.pack_forget()
         self.processor = DataProcessor(path)
         self.plotter   = VoltagePlotter(self.processor)
         self.folder_label.config(text=os.path.basename(path), foreground='black')
@@ -258,14 +332,15 @@ class App:
         # clear the pending callback ID
         self.preview_after_id = None
 
-        # clear old preview
-        for c in self.canvas1_frame.winfo_children():
-            c.destroy()
-
         data = getattr(self, '_preview_data', None)
         fname = getattr(self, '_preview_fname', '')
 
         if data is None:
+            # folder without data: drop the previous folder's trace
+            if self.preview_panel is not None and self._preview_drawn is not None:
+                self.preview_panel.axes()
+                self.preview_panel.draw()
+                self._preview_ax = self._preview_drawn = None
             return
 
         # parse entries, default to full range if blank or invalid
@@ -281,81 +356,123 @@ class App:
         xmin = max(0, xmin)
         xmax = min(data.size, xmax)
 
-        fig, ax = plt.subplots(figsize=(5,3), tight_layout=True)
-        ax.plot(data)
-
-        # only highlight the selected region
-        if xmin < xmax:
-            ax.axvspan(xmin, xmax, color='skyblue', alpha=0.3)
-
-        ax.grid(True)
-        ax.set_title(fname)
-        ax.set_xlabel('Index')
-        ax.set_ylabel('Value')
-
-        canvas = FigureCanvasTkAgg(fig, master=self.canvas1_frame)
-        toolbar = NavigationToolbar2Tk(canvas, self.canvas1_frame)
-        toolbar.update()
-        toolbar.pack(side='top', fill='x')
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill='both', expand=True)
+        # the trace is only redrawn when a new file is previewed;
+        # keystrokes in X Min/X Max just move the highlighted region
+        if self.preview_panel is None:
+            self.preview_panel = PlotPanel(self.canvas1_frame, figsize=(5,3), tight_layout=True)
+        if self._preview_drawn is not data:
+            ax = self.preview_panel.axes()
+            DecimatedLine(ax, None, data)
+            ax.grid(True)
+            ax.set_title(fname)
+            ax.set_xlabel('Index')
+            ax.set_ylabel('Value')
+            self._preview_ax, self._preview_drawn = ax, data
+            self.preview_panel.draw()
+
+        # only highlight the selected region(s)
+        try:
+            windows = parse_windows(self.entry_windows.get())
+        except ValueError:
+            windows = []
+        spans = [(lo, min(hi, data.size)) for lo, hi in windows or [(xmin, xmax)]
+                 if lo < min(hi, data.size)]
+        self.preview_panel.set_spans(self._preview_ax, spans, color='skyblue', alpha=0.3)
 
     def proceed(self):
         try:
             xmin = int(self.entry_min.get()) if self.entry_min.get() else 0
             xmax = int(self.entry_max.get()) if self.entry_max.get() else None
             skip = int(self.entry_skip.get()) if self.entry_skip.get() else 1
+            windows = parse_windows(self.entry_windows.get())
         except ValueError:
             messagebox.showerror("Error", "Invalid parameters.")
             return
 
-        self.plotter.set_params(xmin, xmax, skip)
+        self.plotter.set_params(xmin, xmax, skip, windows, self.area_var.get())
 
         total = len(self.processor.get_files()[::self.plotter.skip])
         self.progress['maximum'] = total
         self.progress['value'] = 0
         self.progress.pack(fill='x', padx=10, pady=5)
-
-        self.plot_intensity()
-        self.save_button.config(state='normal')
-        self.notebook.select(self.tab_intensity)
+        self.save_button.config(state='disabled')
+
+        # files are read on a worker thread; the plot is drawn back on the Tk thread
+        if self.job is not None:
+            self.job.cancel()
+        self.job = BackgroundJob(self.root, self._compute_intensity,
+                                 on_progress=self._update_progress,
+                                 on_done=self.plot_intensity,
+                                 on_error=self._on_error).start()
+
+    def _compute_intensity(self, job):
+        processor, plotter = self.processor, self.plotter
+        meta = {'folder': processor.folder_path, 'x_min': plotter.x_min,
+                'x_max': plotter.x_max, 'skip': plotter.skip,
+                'files': processor.get_files()[::plotter.skip]}
+        if plotter.windows:
+            result = plotter.get_window_intensities(job.report, job.stop_event)
+        else:
+            result = plotter.get_intensity_over_time(job.report, job.stop_event)
+        return list(plotter.windows), result, meta
 
     def _update_progress(self, count):
         self.progress['value'] = count
-        self.progress.update_idletasks()
 
-    def plot_intensity(self):
-        for c in self.canvas2_frame.winfo_children():
-            c.destroy()
+    def _on_error(self, e):
+        self.progress.pack_forget()
+        messagebox.showerror("Error", str(e))
 
-        xs, vals = self.plotter.get_intensity_over_time(progress_callback=self._update_progress)
+    def plot_intensity(self, plotted):
         self.progress.pack_forget()
+        # kept so saving writes exactly what is shown, without re-reading files
+        windows, result, _ = self.plotted = plotted
+        if self.intensity_panel is None:
+            self.intensity_panel = PlotPanel(self.canvas2_frame, figsize=(5,3), tight_layout=True)
+        ax = self.intensity_panel.axes()
+        if windows:
+            xs, maxes, _ = result
+            for (lo, hi), vals in zip(windows, maxes.T):
+                ax.plot(xs, vals, marker='o', label=f'{lo}-{hi}')
+            ax.legend()
+        else:
+            xs, vals = result
+            ax.plot(xs, vals, marker='o')
 
-        fig, ax = plt.subplots(figsize=(5,3), tight_layout=True)
-        ax.plot(xs, vals, marker='o')
         ax.grid(True)
         ax.set_xlabel('File Index')
         ax.set_ylabel('Max Value')
         ax.set_title('Intensity over Time')
-
-        canvas = FigureCanvasTkAgg(fig, master=self.canvas2_frame)
-        toolb = NavigationToolbar2Tk(canvas, self.canvas2_frame)
-        toolb.update()
-        toolb.pack(side='top', fill='x')
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill='both', expand=True)
+        self.intensity_panel.draw()
+        self.save_button.config(state='normal')
+        self.notebook.select(self.tab_intensity)
 
     def save_intensity(self):
-        xs, vals = self.plotter.get_intensity_over_time()
         fpath = filedialog.asksaveasfilename(defaultextension='.csv',
-            filetypes=[('CSV Files','*.csv'), ('Text Files','*.txt')])
+            filetypes=[('CSV Files','*.csv'), ('Text Files','*.txt')] + binary_filetypes())
         if not fpath:
             return
+        windows, result, meta = self.plotted
+        if windows:
+            xs, maxes, areas = result
+            try:
+                if is_binary_path(fpath):
+                    arrays = {'index': xs, 'max': maxes, 'windows': windows}
+                    if areas is not None:
+                        arrays['area'] = areas
+                    save_arrays(fpath, arrays, meta)
+                else:
+                    write_window_csv(fpath, xs, windows, maxes, areas)
+                messagebox.showinfo('Saved', f'Intensity data saved to:\n{fpath}')
+            except Exception as e:
+                messagebox.showerror('Error', str(e))
+            return
+        xs, vals = result
         try:
-            with open(fpath, 'w') as f:
-                f.write('Index,MaxValue\n')
-                for x, v in zip(xs, vals):
-                    f.write(f"{x},{v}\n")
+            if is_binary_path(fpath):
+                save_arrays(fpath, {'index': xs, 'max': vals}, meta)
+            else:
+                write_columns(fpath, ['Index', 'MaxValue'], [xs, vals])
             messagebox.showinfo('Saved', f'Intensity data saved to:\n{fpath}')
         except Exception as e:
             messagebox.showerror('Error', str(e))
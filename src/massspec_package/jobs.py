@@ -0,0 +1,85 @@
+import queue
+import threading
+
+
+class BackgroundJob:
+    """
+    Run heavy work on a worker thread and hand results back to the Tk loop.
+
+    ``target(job)`` runs on its own thread and must not touch widgets. It
+    reports progress through ``job.report(value)`` or ``job.step()`` (a
+    thread-safe counter, usable directly as a ``progress_callback``) and
+    should return early once ``job.stop_event`` is set. The Tk loop polls
+    the job's queue every ``poll_ms`` with ``after`` and calls, on the main
+    thread, ``on_progress(value)`` with the latest value reported since the
+    previous poll, then ``on_done(result)`` or ``on_error(exc)``. Nothing is
+    delivered after ``cancel()``.
+    """
+    def __init__(self, root, target, on_progress=None, on_done=None, on_error=None, poll_ms=50):
+        self.root = root
+        self.target = target
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.on_error = on_error
+        self.poll_ms = poll_ms
+        self.stop_event = threading.Event()
+        self.done = 0
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self.root.after(self.poll_ms, self._poll)
+        return self
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def cancel(self):
+        self.stop_event.set()
+
+    def report(self, value):
+        """Queue a progress value; safe to call from any thread."""
+        self._queue.put(('progress', value))
+
+    def step(self, *_):
+        """Count one finished item and report the running total."""
+        with self._lock:
+            self.done += 1
+            done = self.done
+        self.report(done)
+
+    def _run(self):
+        try:
+            self._queue.put(('done', self.target(self)))
+        except Exception as e:
+            self._queue.put(('error', e))
+
+    def _poll(self):
+        if self.stop_event.is_set():
+            return
+        progress, finished = None, None
+        try:
+            while finished is None:
+                kind, value = self._queue.get_nowait()
+                if kind == 'progress':
+                    progress = (value,)
+                else:
+                    finished = (kind, value)
+        except queue.Empty:
+            pass
+        # only the latest progress value matters; the bar is redrawn once per poll
+        if progress is not None and self.on_progress:
+            self.on_progress(progress[0])
+        if finished is None:
+            self.root.after(self.poll_ms, self._poll)
+        elif finished[0] == 'done' and self.on_done:
+            self.on_done(finished[1])
+        elif finished[0] == 'error':
+            if self.on_error:
+                self.on_error(finished[1])
+            else:
+                raise finished[1]
@@ -0,0 +1,183 @@
+import numpy as np
+
+
+def minmax_decimate(y, n_bins, start=0):
+    """
+    Indices of a min/max envelope of ``y`` with at most ``n_bins`` bins.
+
+    Each bin contributes the positions of its minimum and maximum in index
+    order, plus the first and last sample, so peaks survive decimation.
+    Indices are offset by ``start``.
+    """
+    n = len(y)
+    if n <= 2 * n_bins + 2:
+        return np.arange(start, start + n)
+    per = n // n_bins
+    full = y[:per * n_bins].reshape(n_bins, per)
+    offsets = np.arange(n_bins) * per
+    imin = full.argmin(axis=1) + offsets
+    imax = full.argmax(axis=1) + offsets
+    parts = [[0], np.sort(np.stack([imin, imax], axis=1), axis=1).ravel()]
+    if per * n_bins < n:  # remainder bin
+        tail = y[per * n_bins:]
+        parts.append(np.sort([tail.argmin(), tail.argmax()]) + per * n_bins)
+    parts.append([n - 1])
+    return np.concatenate(parts) + start
+
+
+class DecimatedLine:
+    """
+    A long trace drawn as a min/max envelope of about 2 points per pixel.
+
+    Whenever the axes' x-limits change (zoom, pan, home) the visible range is
+    re-decimated from the full-resolution data, so zooming in stays exact
+    while the canvas only ever renders a few thousand points. ``x=None``
+    means the sample index. An x axis that turns around (like an m/q axis
+    folding back before t0) is split into monotonic runs and the visible
+    part of each run is decimated separately.
+    """
+    MAX_RUNS = 16  # beyond this x is treated as unordered
+
+    def __init__(self, ax, x, y, **kwargs):
+        self.ax = ax
+        self.line, = ax.plot([], [], **kwargs)
+        self.set_data(x, y)
+        # a closure keeps this object alive for as long as the axes
+        ax.callbacks.connect('xlim_changed', lambda _ax: self._redecimate(_ax.get_xlim()))
+
+    def set_data(self, x, y):
+        """
+        Replace the full-resolution data.
+
+        The whole range is shown while x autoscaling is on; once the user has
+        zoomed or panned, the current x-limits are kept and re-decimated.
+        """
+        self.y = np.asarray(y)
+        self.x = None if x is None else np.asarray(x)
+        self._runs = self._monotonic_runs()
+        if self.ax.get_autoscalex_on():
+            self._redecimate(None)
+            self.ax.relim()
+            self.ax.autoscale_view()
+        else:
+            self._redecimate(self.ax.get_xlim())
+
+    def _monotonic_runs(self):
+        # [(start, stop, ascending)]; None if x has too many turns to search
+        n = len(self.y)
+        if self.x is None:
+            return [(0, n, True)]
+        step = np.sign(np.diff(self.x))
+        moving = np.flatnonzero(step)  # flat stretches belong to either side
+        turns = moving[1:][step[moving[1:]] != step[moving[:-1]]]
+        if len(turns) >= self.MAX_RUNS:
+            return None
+        bounds = np.concatenate(([0], turns, [n]))
+        ascending = not len(moving) or step[moving[0]] > 0
+        return [(int(a), int(b), ascending == (k % 2 == 0))
+                for k, (a, b) in enumerate(zip(bounds[:-1], bounds[1:]))]
+
+    def _visible(self, start, stop, ascending, xlim):
+        # padded [lo, hi) of one run's samples inside xlim, or None
+        if self.x is None:
+            lo, hi = int(np.floor(xlim[0])), int(np.ceil(xlim[1])) + 1
+        else:
+            run = self.x[start:stop] if ascending else self.x[start:stop][::-1]
+            if not len(run) or run[0] > xlim[1] or run[-1] < xlim[0]:
+                return None
+            lo, hi = np.searchsorted(run, xlim)
+            hi += 1
+            if not ascending:
+                lo, hi = len(run) - hi, len(run) - lo
+            lo, hi = lo + start, hi + start
+        # one sample past each edge
+        lo, hi = max(start, lo - 1), min(stop, max(hi, lo + 1) + 1)
+        return (lo, hi) if lo < hi else None
+
+    def _redecimate(self, xlim):
+        n = len(self.y)
+        if xlim is None or self._runs is None or not n:
+            ranges = [(0, n)]
+        else:
+            ranges = [r for r in (self._visible(*run, xlim) for run in self._runs) if r]
+        n_bins = max(1, int(self.ax.bbox.width))
+        xs, ys = [], []
+        for lo, hi in ranges:
+            if xs:  # NaN breaks the line so separate runs are not joined across the view
+                xs.append([np.nan])
+                ys.append([np.nan])
+            idx = minmax_decimate(self.y[lo:hi], n_bins, start=lo)
+            xs.append(idx if self.x is None else self.x[idx])
+            ys.append(self.y[idx])
+        if len(xs) == 1:
+            self.line.set_data(xs[0], ys[0])
+        else:
+            self.line.set_data(np.concatenate(xs or [[]]), np.concatenate(ys or [[]]))
+
+
+class PlotPanel:
+    """
+    A matplotlib figure embedded in a Tk container, built once and reused.
+
+    Redraws clear and refill the same Figure, canvas and toolbar instead of
+    stacking new ones. The figure is not registered with pyplot, so nothing
+    leaks between redraws, and ``close`` releases it deterministically.
+    Highlighted x-ranges set through ``set_spans`` are blitted over a cached
+    background, so moving them does not re-render the trace.
+    """
+    def __init__(self, master, figsize=(5, 3), toolbar=True, **fig_kw):
+        # Tk backend imported here so DecimatedLine works headless
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+
+        self.figure = Figure(figsize=figsize, **fig_kw)
+        self.canvas = FigureCanvasTkAgg(self.figure, master=master)
+        self.toolbar = None
+        if toolbar:
+            self.toolbar = NavigationToolbar2Tk(self.canvas, master, pack_toolbar=False)
+            self.toolbar.update()
+            self.toolbar.pack(side='top', fill='x')
+        self.canvas.get_tk_widget().pack(fill='both', expand=True)
+
+        self._spans = []
+        self._background = None
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+
+    def axes(self, nrows=1, ncols=1):
+        """Clear the figure and return fresh axes, like ``plt.subplots``."""
+        self.figure.clear()
+        self._spans, self._background = [], None
+        if self.toolbar:
+            self.toolbar.update()  # forget the zoom history of the old plot
+        return self.figure.subplots(nrows, ncols)
+
+    def draw(self):
+        self.canvas.draw_idle()
+
+    def set_spans(self, ax, ranges, **style):
+        """Highlight ``(lo, hi)`` x-ranges on ``ax``, replacing the previous ones."""
+        for patch in self._spans:
+            patch.remove()
+        self._spans = [ax.axvspan(lo, hi, animated=True, **style) for lo, hi in ranges]
+        if self._background is None:
+            self.canvas.draw()  # _on_draw captures the background and draws the spans
+        else:
+            self.canvas.restore_region(self._background)
+            self._draw_spans()
+            self.canvas.blit(self.figure.bbox)
+
+    def _draw_spans(self):
+        for patch in self._spans:
+            patch.axes.draw_artist(patch)
+
+    def _on_draw(self, _event):
+        self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self._draw_spans()
+
+    def close(self):
+        """Destroy the widgets and free the figure."""
+        if self.toolbar:
+            self.toolbar.destroy()
+        self.canvas.get_tk_widget().destroy()
+        self.figure.clear()
+        self._spans, self._background = [], None
@@ -1,17 +1,21 @@
 # single_waveform.py
 
 import os
-import re
 import json
 import numpy as np
-import matplotlib.pyplot as plt
 import tkinter as tk
 import tkinter.font as tkfont
 from tkinter import ttk, filedialog, messagebox
 
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 from PIL import Image, ImageTk
 
+from .archive import ARCHIVE_EXT
+from .dataset import Dataset, list_data32_files, natural_key
+from .decoder import decode_file
+from .export import binary_filetypes, is_binary_path, save_arrays, write_columns
+from .jobs import BackgroundJob
+from .plotting import DecimatedLine, PlotPanel
+
 # compatibility for Pillow <10 and >=10
 try:
     resample_filter = Image.Resampling.LANCZOS
@@ -25,21 +29,18 @@ class DataProcessor:
     def __init__(self, folder_path):
         self.folder_path = folder_path
 
-    def load_file(self, file_path):
+    def load_file(self, file_path, stop_event=None):
+        # read fully here so the Tk thread never pages data in while plotting
         try:
-            return np.fromfile(file_path, dtype=np.uint32)
+            if isinstance(file_path, np.ndarray):
+                return np.array(file_path)  # archive row
+            return decode_file(file_path, stop_event)
         except Exception as e:
             print(f"Error reading {file_path}: {e}")
             return np.array([])
 
     def get_files(self):
-        if not self.folder_path:
-            return []
-        raw = [f for f in os.listdir(self.folder_path) if f.endswith('.data32')]
-        def natural_key(fn):
-            parts = re.split(r'(\d+)', fn)
-            return [int(p) if p.isdigit() else p.lower() for p in parts]
-        return sorted(raw, key=natural_key)
+        return list_data32_files(self.folder_path)
 
 class VoltagePlotter:
     def __init__(self, processor):
@@ -49,10 +50,13 @@ class VoltagePlotter:
     def set_selected(self, files):
         self.selected = files
 
-    def get_waveforms(self):
+    def get_waveforms(self, stop_event=None):
         data = {}
-        for fn in self.selected:
-            arr = self.processor.load_file(os.path.join(self.processor.folder_path, fn))
+        dataset = Dataset(self.processor.folder_path, self.selected)
+        for fn in dataset.files:
+            if stop_event is not None and stop_event.is_set():
+                break
+            arr = self.processor.load_file(dataset.source(fn), stop_event)
             if arr.size > 0:
                 data[fn] = arr
         return data
@@ -97,6 +101,10 @@ class App:
         # legend option and window placeholder
         self.legend_option = tk.StringVar(value='Inside')
         self.legend_window = None
+        self.panel = None  # plot panel, created on first Proceed
+        self.job = None    # background file loading
+        self.data = {}     # plotted waveforms by file name, saved as shown
+        self.data_folder = None
 
         # setup notebook
         self.notebook = ttk.Notebook(self.root)
@@ -115,6 +123,10 @@ class App:
 
     def _build_menu(self):
         menubar = tk.Menu(self.root)
+        filem = tk.Menu(menubar, tearoff=0)
+        filem.add_command(label='Open Folder...', command=self.select_folder)
+        filem.add_command(label='Open Archive...', command=self.select_archive)
+        menubar.add_cascade(label='File', menu=filem)
         settings = tk.Menu(menubar, tearoff=0)
         settings.add_command(label='Scale...', command=self.open_scale_dialog)
         menubar.add_cascade(label='Settings', menu=settings)
@@ -196,9 +208,18 @@ class App:
         self.save_btn = ttk.Button(self.tab_plot, text='Save Data', state='disabled', command=self.save)
         self.save_btn.pack(pady=5)
 
-    def select_folder(self):
-        path = filedialog.askdirectory()
+    def select_archive(self):
+        path = filedialog.askopenfilename(filetypes=[('Packed archive', '*' + ARCHIVE_EXT)])
+        if path:
+            self.select_folder(path)
+
+    def select_folder(self, path=None):
+        path = path or filedialog.askdirectory()
         if not path: return
+        # waveforms still being read belong to the old folder
+        if self.job is not None:
+            self.job.cancel()
+            self.job = None
         self.processor = DataProcessor(path)
         self.plotter   = VoltagePlotter(self.processor)
         files = self.processor.get_files()
@@ -213,25 +234,28 @@ class App:
             messagebox.showwarning('No Selection', 'Please select one or more files.')
             return
         self.plotter.set_selected(sel)
-        data = self.plotter.get_waveforms()
 
-        # clear plot container
-        for c in self.plot_container.winfo_children():
-            c.destroy()
-
-        # initial plot
-        self.fig, self.ax = plt.subplots(figsize=(7,4))
+        # read the files on a worker thread; the plot is drawn back on the Tk thread
+        if self.job is not None:
+            self.job.cancel()
+        self.job = BackgroundJob(self.root, lambda job: self.plotter.get_waveforms(job.stop_event),
+                                 on_done=self._plot_waveforms,
+                                 on_error=lambda e: messagebox.showerror('Error', str(e))).start()
+
+    def _plot_waveforms(self, data):
+        self.data, self.data_folder = data, self.processor.folder_path
+        # embed once, then reuse the same figure for every selection
+        if self.panel is None:
+            self.panel = PlotPanel(self.plot_container, figsize=(7,4))
+            self.fig, self.canvas = self.panel.figure, self.panel.canvas
+
+        self.ax = self.panel.axes()
+        self.legend = None  # cleared with the old axes
         for fn, arr in data.items():
-            self.ax.plot(np.arange(len(arr)), arr, label=fn)
+            DecimatedLine(self.ax, None, arr, label=fn)
         self.ax.set_title('Selected Waveforms')
         self.ax.grid(True)
 
-        # embed
-        self.canvas = FigureCanvasTkAgg(self.fig, master=self.plot_container)
-        toolbar = NavigationToolbar2Tk(self.canvas, self.plot_container)
-        toolbar.update(); toolbar.pack(side='top', fill='x')
-        self.canvas.draw(); self.canvas.get_tk_widget().pack(fill='both', expand=True)
-
         # update legend placement
         self.update_legend()
 
@@ -277,22 +301,25 @@ class App:
         self.canvas.draw()
 
     def save(self):
-        data = self.plotter.get_waveforms()
+        data = self.data
         if not data:
             messagebox.showwarning('No Data', 'Nothing to save.')
             return
         fpath = filedialog.asksaveasfilename(defaultextension='.csv',
-            filetypes=[('CSV','*.csv'),('Text','*.txt')])
+            filetypes=[('CSV','*.csv'),('Text','*.txt')] + binary_filetypes())
         if not fpath:
             return
-        key = lambda fn: [int(p) if p.isdigit() else p.lower() for p in re.split(r'(\d+)', fn)]
-        waves = [data[fn] for fn in sorted(data, key=key)]
-        maxl = max(len(w) for w in waves)
-        with open(fpath, 'w') as f:
-            f.write(','.join(sorted(data, key=key)) + '\n')
-            for i in range(maxl):
-                row = [str(w[i]) if i < len(w) else '' for w in waves]
-                f.write(','.join(row) + '\n')
+        names = sorted(data, key=natural_key)
+        try:
+            if is_binary_path(fpath):
+                # one array per file, so unequal lengths need no padding
+                save_arrays(fpath, {fn: data[fn] for fn in names},
+                            {'folder': self.data_folder, 'files': names})
+            else:
+                write_columns(fpath, names, [data[fn] for fn in names])
+        except Exception as e:
+            messagebox.showerror('Error', str(e))
+            return
         messagebox.showinfo('Saved', f'Data saved to:\n{fpath}')
 
 if __name__ == '__main__':
@@ -0,0 +1,199 @@
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import numpy as np
+from .decoder import decode_file
+
+# Accumulator precisions: int64 sums uint32 samples exactly, float64 matches
+# the historical float matrix reduction (exact while sums stay below 2**53),
+# float32 halves the accumulator and is exact only below 2**24.
+ACCUMULATOR_DTYPES = (np.dtype(np.int64), np.dtype(np.float64), np.dtype(np.float32))
+
+
+def check_accumulator_dtype(dtype):
+    dtype = np.dtype(dtype)
+    if dtype not in ACCUMULATOR_DTYPES:
+        names = ', '.join(d.name for d in ACCUMULATOR_DTYPES)
+        raise ValueError(f"Unsupported accumulator dtype {dtype.name!r}; use one of: {names}")
+    return dtype
+
+
+def sum_files(file_paths, dtype=np.float64, progress_callback=None, stop_event=None):
+    """
+    Sum .data32 files sample by sample into a single running accumulator.
+
+    Each file is decoded and added in place, so memory stays at one trace
+    length regardless of how many files are summed. ``progress_callback`` is
+    called with the number of files done. Returns None if ``stop_event`` is
+    set before all files are summed.
+    """
+    dtype = check_accumulator_dtype(dtype)
+    total = None
+    for i, path in enumerate(file_paths):
+        if stop_event is not None and stop_event.is_set():
+            return None
+        values = decode_file(path, stop_event)
+        if stop_event is not None and stop_event.is_set():
+            return None  # values may be a partial file
+        if total is None:
+            total = values.astype(dtype)
+        elif values.size != total.size:
+            raise ValueError(f"{path} has {values.size} samples, expected {total.size}")
+        else:
+            total += values
+        if progress_callback:
+            progress_callback(i + 1)
+    return total if total is not None else np.zeros(0, dtype=dtype)
+
+
+def _sum_chunk(file_paths, dtype, stop_event=None):
+    # Module level so the process backend can pickle it.
+    return sum_files(file_paths, dtype, stop_event=stop_event)
+
+
+def _tree_reduce(partials):
+    """Pairwise-add partial sums, halving the list each round."""
+    while len(partials) > 1:
+        reduced = []
+        for a, b in zip(partials[::2], partials[1::2]):
+            if a.size != b.size:
+                raise ValueError(f"Partial sums differ in length: {a.size} vs {b.size}")
+            a += b
+            reduced.append(a)
+        if len(partials) % 2:
+            reduced.append(partials[-1])
+        partials = reduced
+    return partials[0]
+
+
+def parallel_sum_files(file_paths, dtype=np.float64, progress_callback=None, stop_event=None,
+                       workers=None, backend='thread', chunk_size=None):
+    """
+    Sum .data32 files using a pool of workers.
+
+    The file list is split into chunks, each worker streams one chunk into a
+    partial sum and the partials are tree-reduced at the end. ``backend`` is
+    ``'thread'`` (decoding and adding release the GIL) or ``'process'``.
+    ``workers`` defaults to the CPU count; with one worker this is plain
+    ``sum_files``. Progress is reported per file from the calling thread as
+    chunks complete. Returns None if ``stop_event`` is set.
+    """
+    dtype = check_accumulator_dtype(dtype)
+    file_paths = list(file_paths)
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(file_paths) <= 1:
+        return sum_files(file_paths, dtype, progress_callback, stop_event)
+
+    if backend == 'thread':
+        executor_cls, worker_stop = ThreadPoolExecutor, stop_event
+    elif backend == 'process':
+        executor_cls, worker_stop = ProcessPoolExecutor, None  # events don't pickle
+    else:
+        raise ValueError(f"Unknown backend {backend!r}; use 'thread' or 'process'")
+
+    if chunk_size is None:
+        # a few chunks per worker keeps the pool busy and progress smooth
+        chunk_size = max(1, -(-len(file_paths) // (workers * 4)))
+    chunks = [file_paths[i:i + chunk_size] for i in range(0, len(file_paths), chunk_size)]
+
+    partials = [None] * len(chunks)
+    done = 0
+    with executor_cls(max_workers=min(workers, len(chunks))) as pool:
+        futures = {pool.submit(_sum_chunk, chunk, dtype, worker_stop): i
+                   for i, chunk in enumerate(chunks)}
+        try:
+            for future in as_completed(futures):
+                partial = future.result()
+                if partial is None or (stop_event is not None and stop_event.is_set()):
+                    return None
+                i = futures[future]
+                partials[i] = partial
+                if progress_callback:
+                    for _ in chunks[i]:
+                        done += 1
+                        progress_callback(done)
+        finally:
+            for future in futures:
+                future.cancel()
+    return _tree_reduce(partials)
+
+
+class IncrementalSum:
+    """
+    Running sum of a folder that only decodes files it has not folded in yet.
+
+    Every ``refresh`` compares the folder against the (size, mtime) of the
+    files already summed: new files are added, and deleted or rewritten
+    files have their old contribution subtracted. Old contributions are kept
+    for the ``keep_recent`` most recently added files, which covers files
+    that were still being written when first seen; if an older file changes
+    the sum is rebuilt from scratch.
+    """
+    def __init__(self, folder_path, dtype=np.int64, keep_recent=16):
+        self.folder_path = folder_path
+        self.dtype = check_accumulator_dtype(dtype)
+        self.keep_recent = keep_recent
+        self.reset()
+
+    def reset(self):
+        self.total = None
+        self.fingerprints = {}  # name -> (size, mtime_ns) of folded files
+        self._recent = OrderedDict()  # name -> decoded values, newest last
+
+    def scan(self):
+        """{name: (size, mtime_ns)} of the .data32 files currently in the folder."""
+        out = {}
+        with os.scandir(self.folder_path) as it:
+            for entry in it:
+                if entry.name.endswith('.data32') and entry.is_file():
+                    st = entry.stat()
+                    out[entry.name] = (st.st_size, st.st_mtime_ns)
+        return out
+
+    def _add(self, name, values, fingerprint):
+        if not self.fingerprints:
+            self.total = np.zeros(values.size, dtype=self.dtype)
+        elif values.size != self.total.size:
+            raise ValueError(f"{name} has {values.size} samples, expected {self.total.size}")
+        self.total += values
+        self.fingerprints[name] = fingerprint
+        self._recent[name] = values
+        while len(self._recent) > self.keep_recent:
+            self._recent.popitem(last=False)
+
+    def _remove(self, name):
+        self.total -= self._recent.pop(name)
+        del self.fingerprints[name]
+
+    def refresh(self, progress_callback=None, stop_event=None, snapshot=None, ready=None):
+        """
+        Bring the sum up to date with the folder.
+
+        ``snapshot`` reuses the result of a previous ``scan``; if ``ready`` is
+        given, only new files named in it are folded in. Returns the names of
+        the files that were (re)decoded, or None if ``stop_event`` was set;
+        files folded before the stop are kept.
+        """
+        current = self.scan() if snapshot is None else snapshot
+        stale = [n for n, fp in self.fingerprints.items() if current.get(n) != fp]
+        if any(n not in self._recent for n in stale):
+            self.reset()  # an old contribution is no longer known
+            stale = []
+        for name in stale:
+            self._remove(name)
+
+        added = [n for n in current
+                 if n not in self.fingerprints and (ready is None or n in ready)]
+        for i, name in enumerate(added):
+            if stop_event is not None and stop_event.is_set():
+                return None
+            values = decode_file(os.path.join(self.folder_path, name), stop_event)
+            if stop_event is not None and stop_event.is_set():
+                return None  # values may be a partial file
+            self._add(name, values, current[name])
+            if progress_callback:
+                progress_callback(i + 1)
+        if self.total is None:
+            self.total = np.zeros(0, dtype=self.dtype)
+        return added
@@ -1,5 +1,6 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
-import matplotlib.pyplot as plt
 from .data_processor import DataProcessor
 
 class VoltagePlotter:
@@ -8,15 +9,24 @@ class VoltagePlotter:
         self.background_processor = background_processor
         self.difference = None
 
-    def calculate_difference(self):
-        summed_voltages_measurement = self.measurement_processor.calculate_summed_voltages()
-        summed_voltages_background = self.background_processor.calculate_summed_voltages()
+    def calculate_difference(self, concurrent=False):
+        if concurrent:
+            # Sum both folders at the same time so their I/O waits overlap
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                measurement = pool.submit(self.measurement_processor.calculate_summed_voltages)
+                background = pool.submit(self.background_processor.calculate_summed_voltages)
+                summed_voltages_measurement = measurement.result()
+                summed_voltages_background = background.result()
+        else:
+            summed_voltages_measurement = self.measurement_processor.calculate_summed_voltages()
+            summed_voltages_background = self.background_processor.calculate_summed_voltages()
         self.difference = summed_voltages_measurement - summed_voltages_background
 
     def plot_difference(self):
         if self.difference is None:
             self.calculate_difference()
 
+        import matplotlib.pyplot as plt  # only needed for interactive plotting
         x_array = np.arange(len(self.difference))
         figure = plt.figure(figsize=(14, 6))
         ax = figure.add_subplot(1, 1, 1)
@@ -0,0 +1,32 @@
+import numpy as np
+from .summation import IncrementalSum
+
+
+class FolderWatcher:
+    """
+    Follow a measurement folder while the Acqiris card is still writing to it.
+
+    Each ``poll`` scans the folder and folds in the .data32 files whose size
+    and mtime did not change since the previous poll, i.e. files the card has
+    finished writing. Only those new files are decoded; the running sum is
+    available as ``total``.
+    """
+    def __init__(self, folder_path, dtype=np.int64):
+        self.folder_path = folder_path
+        self.running_sum = IncrementalSum(folder_path, dtype)
+        self._last_scan = {}
+
+    @property
+    def total(self):
+        return self.running_sum.total
+
+    @property
+    def file_count(self):
+        return len(self.running_sum.fingerprints)
+
+    def poll(self, stop_event=None):
+        """Fold in newly completed files; returns their names (None if stopped)."""
+        scan = self.running_sum.scan()
+        settled = {name for name, fp in scan.items() if self._last_scan.get(name) == fp}
+        self._last_scan = scan
+        return self.running_sum.refresh(stop_event=stop_event, snapshot=scan, ready=settled)
@@ -0,0 +1,634 @@
+import numpy as np
+import pytest
+
+from massspec_package.decoder import decode_file
+
+
+def _write_data32(path, values):
+    np.asarray(values, dtype='<u4').tofile(path)
+    return path
+
+
+def test_decode_file_matches_bytewise_reader(tmp_path):
+    values = np.random.default_rng(0).integers(0, 2**32, 1000, dtype=np.uint64)
+    path = _write_data32(tmp_path / 'a.data32', values)
+    with open(path, 'ab') as f:
+        f.write(b'\x01\x02')  # trailing partial sample
+
+    expected = []
+    with open(path, 'rb') as f:
+        while chunk := f.read(4):
+            expected.append(int.from_bytes(chunk, byteorder='little'))
+
+    decoded = decode_file(path, block_samples=64)
+    assert decoded.dtype == np.dtype('<u4')
+    assert decoded.tolist() == expected
+
+
+def _make_folder(folder, n_files=5, n_samples=256, seed=1):
+    rng = np.random.default_rng(seed)
+    folder.mkdir(exist_ok=True)
+    data = rng.integers(0, 2**32, (n_files, n_samples), dtype=np.uint64)
+    for i, row in enumerate(data):
+        _write_data32(folder / f'trace_{i}.data32', row)
+    return data
+
+
+def test_streaming_sum_matches_matrix_sum(tmp_path):
+    from massspec_package.data_processor import DataProcessor
+
+    data = _make_folder(tmp_path / 'meas')
+    expected = np.sum(np.array(data, dtype=np.float64), axis=0)
+
+    summed = DataProcessor(str(tmp_path / 'meas')).calculate_summed_voltages()
+    np.testing.assert_array_equal(summed, expected)
+
+    exact = DataProcessor(str(tmp_path / 'meas'), dtype=np.int64).calculate_summed_voltages()
+    assert exact.dtype == np.int64
+    assert exact.tolist() == data.sum(axis=0).tolist()
+
+
+def test_parallel_sum_matches_serial(tmp_path):
+    from massspec_package.summation import parallel_sum_files
+
+    data = _make_folder(tmp_path / 'meas', n_files=11)
+    paths = sorted(str(p) for p in (tmp_path / 'meas').iterdir())
+    for backend in ('thread', 'process'):
+        ticks = []
+        summed = parallel_sum_files(paths, np.int64, ticks.append,
+                                    workers=3, backend=backend, chunk_size=2)
+        assert summed.tolist() == data.sum(axis=0).tolist()
+        assert ticks == list(range(1, 12))
+
+
+def test_concurrent_difference_matches_serial(tmp_path):
+    from massspec_package.data_processor import DataProcessor
+    from massspec_package.voltage_plotter import VoltagePlotter
+
+    meas = _make_folder(tmp_path / 'meas', seed=1)
+    back = _make_folder(tmp_path / 'back', seed=2)
+    vp = VoltagePlotter(DataProcessor(str(tmp_path / 'meas')), DataProcessor(str(tmp_path / 'back')))
+    vp.calculate_difference(concurrent=True)
+    expected = meas.sum(axis=0).astype(np.float64) - back.sum(axis=0).astype(np.float64)
+    np.testing.assert_array_equal(vp.difference, expected)
+
+
+def test_dataset_views_are_zero_copy_and_naturally_sorted(tmp_path):
+    from massspec_package.dataset import Dataset
+
+    for name in ('run10.data32', 'run2.data32', 'run1.data32'):
+        _write_data32(tmp_path / name, np.arange(100))
+    (tmp_path / 'empty.data32').touch()
+
+    ds = Dataset(str(tmp_path))
+    assert ds.files == ['empty.data32', 'run1.data32', 'run2.data32', 'run10.data32']
+    assert len(ds[0]) == 0
+    window = ds.window('run10.data32', 10, 20)
+    assert window.tolist() == list(range(10, 20))
+    assert not window.flags.owndata and not window.flags.writeable
+
+
+def test_sum_cache_hits_and_invalidates(tmp_path):
+    from massspec_package.cache import SumCache
+    from massspec_package.data_processor import DataProcessor
+
+    data = _make_folder(tmp_path / 'meas')
+    cache = SumCache(str(tmp_path / 'cache'), max_bytes=10 ** 6)
+    first = DataProcessor(str(tmp_path / 'meas'), cache=cache).calculate_summed_voltages()
+    assert len(list((tmp_path / 'cache').glob('*.npy'))) == 1
+
+    ticks = []
+    again = DataProcessor(str(tmp_path / 'meas'), ticks.append, cache=cache).calculate_summed_voltages()
+    np.testing.assert_array_equal(again, first)
+    assert ticks == [1, 2, 3, 4, 5]
+
+    _write_data32(tmp_path / 'meas' / 'trace_0.data32', np.zeros(256) + 7)
+    changed = DataProcessor(str(tmp_path / 'meas'), cache=cache).calculate_summed_voltages()
+    assert changed.tolist() == (data[1:].sum(axis=0) + 7).tolist()
+
+    tiny = SumCache(str(tmp_path / 'cache'), max_bytes=3000)
+    tiny.put('extra', np.zeros(256))
+    assert len(list((tmp_path / 'cache').glob('*.npy'))) == 1
+    assert not [p for p in (tmp_path / 'cache').iterdir() if p.name.startswith('.tmp-')]
+
+    # a concurrent process overwrote the manifest: the orphaned array is still
+    # served, counted against the limit and evicted first
+    import os
+    shared = SumCache(str(tmp_path / 'shared'), max_bytes=5000)
+    shared.put('a', np.zeros(256))
+    shared.put('b', np.ones(256))
+    (tmp_path / 'shared' / 'manifest.json').write_text('{}')
+    os.utime(tmp_path / 'shared' / 'a.npy', (1, 1))
+    assert shared.get('b').tolist() == [1.0] * 256
+    shared.put('c', np.ones(256))
+    assert sorted(p.name for p in (tmp_path / 'shared').glob('*.npy')) == ['b.npy', 'c.npy']
+    (tmp_path / 'shared' / 'manifest.json').write_text('{}')
+    shared.clear()
+    assert not list((tmp_path / 'shared').glob('*.npy'))
+
+    (tmp_path / 'not_a_dir').write_text('')  # cache writes fail, the sum is still returned
+    broken = SumCache(str(tmp_path / 'not_a_dir'))
+    summed = DataProcessor(str(tmp_path / 'meas'), cache=broken).calculate_summed_voltages()
+    np.testing.assert_array_equal(summed, changed)
+
+
+def test_incremental_sum_tracks_new_changed_and_deleted_files(tmp_path):
+    from massspec_package.data_processor import DataProcessor
+
+    folder = tmp_path / 'live'
+    data = _make_folder(folder, n_files=3)
+    proc = DataProcessor(str(folder), dtype=np.int64, incremental=True)
+    assert proc.calculate_summed_voltages().tolist() == data.sum(axis=0).tolist()
+
+    _write_data32(folder / 'trace_3.data32', np.full(256, 5))
+    (folder / 'trace_0.data32').unlink()
+    _write_data32(folder / 'trace_1.data32', np.full(256, 2, dtype=np.int64) + 1)
+    expected = data[2] + 5 + 3
+    assert proc.calculate_summed_voltages().tolist() == expected.tolist()
+    assert proc.running_sum.refresh() == []
+
+
+def test_folder_watcher_folds_only_completed_files(tmp_path):
+    from massspec_package.watcher import FolderWatcher
+
+    watcher = FolderWatcher(str(tmp_path))
+    _write_data32(tmp_path / 'trace_0.data32', np.full(64, 1))
+    assert watcher.poll() == []  # seen once, may still be written
+    assert watcher.poll() == ['trace_0.data32']
+
+    with open(tmp_path / 'trace_1.data32', 'wb') as f:
+        f.write(np.full(32, 2, dtype='<u4').tobytes())  # half-written
+    assert watcher.poll() == []
+    _write_data32(tmp_path / 'trace_1.data32', np.full(64, 2))
+    assert watcher.poll() == []
+    assert watcher.poll() == ['trace_1.data32']
+    assert watcher.total.tolist() == [3] * 64
+    assert watcher.file_count == 2
+
+
+def test_live_watch_stops_on_mismatched_spectrum_lengths(tmp_path):
+    import threading
+    from types import SimpleNamespace
+    from massspec_package.gui import App
+
+    _make_folder(tmp_path / 'meas', n_samples=256)
+    _make_folder(tmp_path / 'back', n_samples=128)
+    app = SimpleNamespace(measurement_folder=str(tmp_path / 'meas'), sum_cache=None,
+                          background_folder=str(tmp_path / 'back'), watch_interval=0.01)
+    job = SimpleNamespace(stop_event=threading.Event(), report=None)
+    with pytest.raises(ValueError, match='256 samples'):
+        App._watch_loop(app, job)
+
+
+def test_intensity_over_time_reuses_cached_series(tmp_path, monkeypatch):
+    from massspec_package import intensity_over_time as iot
+
+    for i in range(4):
+        _write_data32(tmp_path / f'run{i}.data32', np.arange(50) + i)
+    plotter = iot.VoltagePlotter(iot.DataProcessor(str(tmp_path)))
+    plotter.set_params(5, 10, 1)
+    xs, vals = plotter.get_intensity_over_time()
+    assert vals == [9, 10, 11, 12]
+
+    monkeypatch.setattr(iot, 'intensity_series', None)  # no re-reads allowed
+    assert plotter.get_intensity_over_time() == (xs, vals)
+
+
+def test_intensity_series_stop_early_without_caching(tmp_path):
+    import threading
+    from massspec_package import intensity_over_time as iot
+    from massspec_package.intensity import intensity_series, window_series
+
+    paths = [_write_data32(tmp_path / f'run{i}.data32', np.arange(50) + i) for i in range(4)]
+    stop = threading.Event()
+    stop.set()
+    assert intensity_series(paths, 5, 10, workers=2, stop_event=stop) is None
+    assert window_series(paths, [(5, 10)], True, workers=2, stop_event=stop) is None
+
+    plotter = iot.VoltagePlotter(iot.DataProcessor(str(tmp_path)))
+    plotter.set_params(5, 10, 1)
+    assert plotter.get_intensity_over_time(stop_event=stop) is None
+    assert plotter.get_intensity_over_time()[1] == [9, 10, 11, 12]
+
+
+def test_read_window_follows_slice_semantics(tmp_path):
+    from massspec_package.decoder import read_window
+
+    path = _write_data32(tmp_path / 'a.data32', np.arange(100))
+    values = np.arange(100)
+    for start, stop in [(0, None), (10, 20), (90, 500), (-5, None), (50, 40)]:
+        assert read_window(path, start, stop).tolist() == values[start:stop].tolist()
+
+
+def test_window_series_matches_per_window_slicing(tmp_path):
+    from massspec_package.intensity import parse_windows, window_series, write_window_csv
+
+    data = _make_folder(tmp_path / 'meas', n_files=3, n_samples=500)
+    paths = [str(tmp_path / 'meas' / f'trace_{i}.data32') for i in range(3)]
+    windows = parse_windows('10-50; 30-80;450-600')
+    maxes, areas = window_series(paths, windows, area=True, workers=2)
+    assert maxes.shape == areas.shape == (3, 3)
+    for i, row in enumerate(data):
+        for k, (lo, hi) in enumerate(windows):
+            assert maxes[i, k] == row[lo:hi].max()
+            assert areas[i, k] == row[lo:hi].sum()
+
+    write_window_csv(tmp_path / 'out.csv', [1, 2, 3], windows, maxes, areas)
+    lines = (tmp_path / 'out.csv').read_text().splitlines()
+    assert lines[0] == 'Index,Max_10_50,Max_30_80,Max_450_600,Area_10_50,Area_30_80,Area_450_600'
+    assert len(lines) == 4
+
+
+def test_decimated_line_keeps_peaks_and_redecimates_on_zoom():
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from massspec_package.plotting import DecimatedLine
+
+    y = np.random.default_rng(0).normal(size=1_000_003)
+    y[123456] = 50.0
+    fig, ax = plt.subplots()
+    line = DecimatedLine(ax, None, y)
+    assert len(line.line.get_xdata()) < 2 * fig.bbox.width + 10
+    assert line.line.get_ydata().max() == 50.0
+
+    ax.set_xlim(1000, 1100)
+    np.testing.assert_array_equal(line.line.get_xdata(), np.arange(999, 1102))
+    np.testing.assert_array_equal(line.line.get_ydata(), y[999:1102])
+
+    line.set_data(None, y * 2)  # a live refresh keeps the zoomed view exact
+    assert ax.get_xlim() == (1000, 1100)
+    np.testing.assert_array_equal(line.line.get_xdata(), np.arange(999, 1102))
+    np.testing.assert_array_equal(line.line.get_ydata(), 2 * y[999:1102])
+    plt.close(fig)
+
+
+def test_decimated_line_zooms_into_a_folded_mq_axis():
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from massspec_package.calibration_engine import Calibration
+    from massspec_package.plotting import DecimatedLine
+
+    mq = Calibration(500, 37).mq_axis(200_000)  # falls until t0, then rises
+    y = np.random.default_rng(0).normal(size=len(mq))
+    fig, ax = plt.subplots()
+    line = DecimatedLine(ax, mq, y)
+    ax.set_xlim(100, 100.5)
+    inside = (mq >= 100) & (mq <= 100.5)
+    xs = line.line.get_xdata()
+    assert inside.sum() > 0
+    assert np.isin(mq[inside], xs).all()
+    assert len(xs) <= inside.sum() + 4
+
+    ax.set_xlim(0, 0.001)  # both sides of the fold are visible
+    xs = line.line.get_xdata()
+    assert np.isnan(xs).sum() == 1
+    assert np.isin(mq[mq <= 0.001], xs).all()
+    plt.close(fig)
+
+
+def test_background_job_delivers_latest_progress_and_result_on_poll():
+    from massspec_package.jobs import BackgroundJob
+
+    class FakeRoot:
+        def __init__(self):
+            self.pending = []
+
+        def after(self, ms, fn):
+            self.pending.append(fn)
+
+    def target(job):
+        for _ in range(5):
+            job.step()
+        return 'ok'
+
+    root, seen, done = FakeRoot(), [], []
+    job = BackgroundJob(root, target, on_progress=seen.append, on_done=done.append).start()
+    job._thread.join()
+    while root.pending:
+        root.pending.pop(0)()
+    assert seen == [5] and done == ['ok']
+
+
+def test_cli_subtract_and_calibrate_headless(tmp_path):
+    from massspec_package.cli import main
+
+    meas = _make_folder(tmp_path / 'meas', seed=1)
+    back = _make_folder(tmp_path / 'back', seed=2)
+    diff = meas.sum(axis=0).astype(np.float64) - back.sum(axis=0).astype(np.float64)
+
+    assert main(['subtract', str(tmp_path / 'meas'), str(tmp_path / 'back'),
+                 '-o', str(tmp_path / 'diff.txt'), '--workers', '2']) == 0
+    assert (tmp_path / 'diff.txt').read_text().splitlines() == [f"{v}" for v in diff]
+
+    args = ['calibrate', str(tmp_path / 'meas'), str(tmp_path / 'back')]
+    assert main(args + ['-o', str(tmp_path / 'a.txt'), '--t1', '40', '--t2', '90', '--m1', '4',
+                        '--m2', '16', '--save-calibration', str(tmp_path / 'cal.json')]) == 0
+    assert main(args + ['-o', str(tmp_path / 'b.txt'), '--calibration', str(tmp_path / 'cal.json')]) == 0
+    assert (tmp_path / 'a.txt').read_text() == (tmp_path / 'b.txt').read_text()
+    mq = np.loadtxt(tmp_path / 'a.txt', skiprows=1)[:, 0]
+    np.testing.assert_allclose(mq[[40, 90]], [4, 16], atol=1e-6)
+    assert main(args + ['-o', str(tmp_path / 'c.txt'), '--t1', '40', '--t2', '90', '--m1', '4',
+                        '--m2', '4']) == 1
+    assert not (tmp_path / 'c.txt').exists()
+
+    # pressure calibration of binned data: the offset is added once per bin
+    from massspec_package.calibration_engine import Calibration
+    cal = Calibration.load(tmp_path / 'cal.json')
+    cal.y_mode, cal.y_coeffs = 'Absolute pressure', np.array([2e-9, 1e-6])
+    cal.save(tmp_path / 'cal.json')
+    assert main(args + ['-o', str(tmp_path / 'p.txt'), '--calibration', str(tmp_path / 'cal.json'),
+                        '--y', '--bin-width', '0.5']) == 0
+    centers, sums = cal.rebin(diff, 0.5)
+    np.testing.assert_allclose(np.loadtxt(tmp_path / 'p.txt', skiprows=1),
+                               np.c_[centers, 2e-9 * sums + 1e-6], rtol=1e-6)
+
+
+def test_core_import_is_fast_and_skips_gui_modules():
+    import subprocess
+    import sys
+
+    # fresh interpreter; numpy is imported first so only our own modules are timed
+    code = (
+        "import sys, time, numpy\n"
+        "t = time.perf_counter()\n"
+        "import massspec_package, massspec_package.cli\n"
+        "massspec_package.DataProcessor, massspec_package.VoltagePlotter\n"
+        "print(time.perf_counter() - t)\n"
+        "print(sorted(m for m in ('tkinter', 'matplotlib', 'PIL', 'scipy') if m in sys.modules))\n"
+    )
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    elapsed, loaded = out.stdout.splitlines()
+    assert loaded == '[]'
+    assert float(elapsed) < 0.5, f"core import took {float(elapsed):.3f}s"
+
+
+def test_peak_areas_match_walking_integration():
+    from scipy.signal import find_peaks
+    from massspec_package.peaks import peak_areas
+
+    def walking(x, y, h):  # previous per-peak loop from the calibration GUI
+        peaks, _ = find_peaks(y, height=h)
+        areas, crossings = [], []
+        for p in peaks:
+            l, r = p, p
+            while l > 0 and y[l] > 0: l -= 1
+            while r < len(y) - 1 and y[r] > 0: r += 1
+            areas.append(np.sum(y[l:r + 1])); crossings.append((x[l], x[r]))
+        return np.array(areas), crossings, peaks
+
+    rng = np.random.default_rng(3)
+    x = np.linspace(0, 50, 5000)
+    for y in (np.round(rng.normal(0, 20, 5000)),                 # dense, integer valued
+              np.convolve(rng.normal(1, 5, 5000), np.ones(30), 'same'),  # wide lobes
+              np.abs(rng.normal(0, 1, 300)) + 1):                # never crosses zero
+        for h in (-5, 0, 10):
+            areas, crossings, peaks = peak_areas(x, y, h)
+            ref_areas, ref_crossings, ref_peaks = walking(x, y, h)
+            np.testing.assert_array_equal(peaks, ref_peaks)
+            assert crossings == ref_crossings
+            if np.all(y == np.round(y)):
+                np.testing.assert_array_equal(areas, ref_areas)
+            else:
+                np.testing.assert_allclose(areas, ref_areas, rtol=1e-9, atol=1e-6)
+
+
+def test_calibration_engine_fits_saves_and_applies(tmp_path):
+    from massspec_package.calibration_engine import Calibration
+
+    C, t0 = 500.0, 37.0
+    masses = np.array([1.0, 4.0, 16.0, 28.0, 40.0])
+    times = C * np.sqrt(masses) + t0
+    two = Calibration.from_points(times[:2], masses[:2])
+    many = Calibration.from_points(times + [0.3, -0.2, 0.1, -0.1, 0.2], masses)
+    assert (two.C, two.t0) == (C, t0)
+    assert abs(many.C - C) < 0.1 and abs(many.t0 - t0) < 0.5
+    for bad_t, bad_m in [([40, 90], [4, 4]), ([40, 90, 120], [4, 4, 4]), ([40, 90], [4, -1])]:
+        with pytest.raises(ValueError):
+            Calibration.from_points(bad_t, bad_m)
+
+    spectra = np.random.default_rng(0).integers(0, 1000, (3, 4000)).astype(np.float64)
+    mq, y = two.apply(spectra)
+    assert mq is two.mq_axis(4000) and not mq.flags.writeable
+    np.testing.assert_array_equal(mq, ((np.arange(4000) - t0) / C) ** 2)
+    np.testing.assert_array_equal(y, spectra)
+
+    two.fit_pressure(heights=[10.0, 20.0, 40.0], areas=[1.0, 2.0, 5.0], p0=8.0)
+    two.save(tmp_path / 'cal.json')
+    loaded = Calibration.load(tmp_path / 'cal.json')
+    np.testing.assert_array_equal(loaded.apply(spectra)[1], np.poly1d(two.y_coeffs)(spectra))
+    assert loaded.to_dict() == two.to_dict()
+
+
+def test_calibration_window_matches_mask_on_physical_branch():
+    from massspec_package.calibration_engine import Calibration
+
+    n = 5000
+    T = np.arange(n)
+    for cal in (Calibration(400.0, 120.4), Calibration(-400.0, 4800.6), Calibration(300.0, -50.0)):
+        mq = cal.mq_axis(n)
+        physical = (T - cal.t0) / cal.C >= 0
+        assert np.flatnonzero(physical).tolist() == T[cal.branch(n)].tolist()
+        for lo, hi in [(0, 1e9), (4.0, 16.0), (15.9, 16.1), (50.0, 40.0), (1e6, 2e6)]:
+            expected = np.flatnonzero(physical & (mq >= lo) & (mq <= hi))
+            assert T[cal.window(n, lo, hi)].tolist() == expected.tolist()
+        idx = cal.index_of([4.0, 16.0], n)
+        for i, m in zip(idx, [4.0, 16.0]):
+            assert mq[i] >= m and abs(i - cal.time_of(m)) < 1
+
+
+def test_rebin_matches_histogram_weights():
+    from massspec_package.calibration_engine import Calibration
+
+    spectra = np.random.default_rng(1).integers(-50, 1000, (2, 20000)).astype(np.float64)
+    for cal in (Calibration(900.0, 250.3), Calibration(-900.0, 19000.5)):
+        mq = cal.mq_axis(20000)
+        phys = (np.arange(20000) - cal.t0) / cal.C >= 0
+        for width, lo, hi in [(0.5, None, None), (0.01, 3.0, 5.0), (2.0, 100.0, 120.0)]:
+            centers, sums = cal.rebin(spectra, width, lo, hi)
+            start = np.floor(mq[phys].min() / width) * width if lo is None else lo
+            edges = start + width * np.arange(len(centers) + 1)
+            assert edges[-1] > (mq[phys].max() if hi is None else hi)
+            for row, out in zip(spectra, sums):
+                ref, _ = np.histogram(mq[phys], bins=edges, weights=row[phys])
+                np.testing.assert_allclose(out, ref, rtol=1e-12)
+
+
+def test_export_writers_match_loops_and_are_faster(tmp_path):
+    import time
+    from massspec_package.export import write_columns, write_values
+
+    def best_of(fn, repeat=3):
+        times = []
+        for _ in range(repeat):
+            t = time.perf_counter(); fn(); times.append(time.perf_counter() - t)
+        return min(times)
+
+    rng = np.random.default_rng(0)
+    diff = rng.integers(-10**6, 10**6, 200_000).astype(np.float64)
+    diff[100_000:] /= 7  # whole and fractional blocks take different paths
+    waves = [rng.integers(0, 2**32, n, dtype=np.uint64).astype('<u4') for n in (60_000, 45_000, 60_001)]
+
+    def old_values():  # previous Background Subtractor writer
+        with open(tmp_path / 'old.txt', 'w') as f:
+            for v in diff:
+                f.write(f"{v}\n")
+
+    def old_columns():  # previous single-waveform writer
+        maxl = max(len(w) for w in waves)
+        with open(tmp_path / 'old.csv', 'w') as f:
+            f.write('a,b,c\n')
+            for i in range(maxl):
+                row = [str(w[i]) if i < len(w) else '' for w in waves]
+                f.write(','.join(row) + '\n')
+
+    new_values = lambda: write_values(tmp_path / 'new.txt', diff, chunk_rows=50_000)
+    new_columns = lambda: write_columns(tmp_path / 'new.csv', ['a', 'b', 'c'], waves, chunk_rows=50_000)
+    timings = {name: best_of(fn) for name, fn in
+               [('old_values', old_values), ('new_values', new_values),
+                ('old_columns', old_columns), ('new_columns', new_columns)]}
+
+    assert (tmp_path / 'new.txt').read_bytes() == (tmp_path / 'old.txt').read_bytes()
+    assert (tmp_path / 'new.csv').read_bytes() == (tmp_path / 'old.csv').read_bytes()
+    assert timings['new_values'] < timings['old_values'], timings
+    assert timings['new_columns'] < timings['old_columns'], timings
+
+    # intensity series: uint32 maxima with NaN for an empty file stay integers
+    from massspec_package.intensity import intensity_series
+    paths = [_write_data32(tmp_path / f'run{i}.data32', np.arange(50) + i) for i in range(3)]
+    paths.insert(1, _write_data32(tmp_path / 'empty.data32', []))
+    xs, vals = [1, 2, 3, 4], intensity_series(paths, 5, 10)
+    write_columns(tmp_path / 'int.csv', ['Index', 'MaxValue'], [xs, vals])
+    expected = 'Index,MaxValue\n' + ''.join(f"{x},{v}\n" for x, v in zip(xs, vals))
+    assert (tmp_path / 'int.csv').read_text() == expected == 'Index,MaxValue\n1,9\n2,nan\n3,10\n4,11\n'
+
+
+def test_binary_export_round_trips_arrays_and_metadata(tmp_path):
+    import importlib.util
+    from massspec_package.cli import main
+    from massspec_package.export import load_arrays, save_arrays
+
+    waves = {'run1.data32': np.arange(5, dtype='<u4'), 'run10.data32': np.arange(3, dtype='<u4')}
+    save_arrays(tmp_path / 'w.npz', waves, {'folder': '/data', 'files': list(waves)})
+    arrays, meta = load_arrays(tmp_path / 'w.npz')
+    assert meta == {'folder': '/data', 'files': ['run1.data32', 'run10.data32']}
+    assert {k: v.tolist() for k, v in arrays.items()} == {k: v.tolist() for k, v in waves.items()}
+
+    meas = _make_folder(tmp_path / 'meas', seed=1)
+    back = _make_folder(tmp_path / 'back', seed=2)
+    args = ['calibrate', str(tmp_path / 'meas'), str(tmp_path / 'back'),
+            '--t1', '40', '--t2', '90', '--m1', '4', '--m2', '16']
+    assert main(args + ['-o', str(tmp_path / 'cal.npz')]) == 0
+    assert main(args + ['-o', str(tmp_path / 'cal.txt')]) == 0
+    arrays, meta = load_arrays(tmp_path / 'cal.npz')
+    text = np.loadtxt(tmp_path / 'cal.txt', skiprows=1)
+    np.testing.assert_allclose(arrays['mq'], text[:, 0], atol=5e-7)
+    assert arrays['intensity'].tolist() == (meas.sum(axis=0).astype(float) - back.sum(axis=0)).tolist()
+    assert meta['measurement_files'] == 5 and meta['points'] == [[40, 4], [90, 16]]
+
+    assert main(['subtract', str(tmp_path / 'meas'), str(tmp_path / 'back'), '-o', str(tmp_path / 'd.npy')]) == 0
+    arrays, meta = load_arrays(tmp_path / 'd.npy')
+    assert arrays['d'].tolist() == text[:, 1].tolist() and meta['background_files'] == 5
+
+    if importlib.util.find_spec('h5py') is None:  # optional dependency: a clean error, no traceback
+        assert main(['subtract', str(tmp_path / 'meas'), str(tmp_path / 'back'),
+                     '-o', str(tmp_path / 'd.h5')]) == 1
+
+
+def test_archive_packs_and_reads_like_the_folder(tmp_path):
+    from massspec_package.archive import Archive, pack, unpack
+    from massspec_package.data_processor import DataProcessor
+    from massspec_package.dataset import Dataset, list_data32_files
+    from massspec_package import intensity_over_time as iot
+
+    folder = tmp_path / 'meas'
+    data = _make_folder(folder, n_files=12)
+    _write_data32(folder / 'trace_short.data32', np.arange(100))
+    archive = pack(str(folder))
+    assert archive == str(folder) + '.d32pack'
+    assert Archive(archive).data.shape == (13, 256)
+    assert list_data32_files(archive) == list_data32_files(str(folder))
+
+    ds_dir, ds_arc = Dataset(str(folder)), Dataset(archive)
+    for name in ds_dir.files:
+        assert ds_arc[name].tolist() == ds_dir[name].tolist()
+
+    (folder / 'trace_short.data32').unlink()
+    archive = pack(str(folder), str(tmp_path / 'equal.d32pack'))
+    summed = DataProcessor(archive, dtype=np.int64, workers=3).calculate_summed_voltages()
+    assert summed.tolist() == data.sum(axis=0).tolist()
+
+    results = []
+    for source in (str(folder), archive):
+        plotter = iot.VoltagePlotter(iot.DataProcessor(source))
+        plotter.set_params(10, 50, 2, windows=[(0, 8), (200, 300)], area=True)
+        results.append((plotter.get_intensity_over_time(), plotter.get_window_intensities()))
+    assert results[0][0] == results[1][0]
+    for a, b in zip(results[0][1], results[1][1]):
+        np.testing.assert_array_equal(a, b)
+
+    unpack(archive, str(tmp_path / 'restored'))
+    for name in list_data32_files(str(folder)):
+        assert (tmp_path / 'restored' / name).read_bytes() == (folder / name).read_bytes()
+
+
+def test_folder_index_scans_once_until_the_folder_changes(tmp_path, monkeypatch):
+    import os
+    from massspec_package import dataset
+
+    _make_folder(tmp_path, n_files=3)
+    old = 1_000_000_000_000_000_000
+    os.utime(tmp_path, ns=(old, old))
+    scans = []
+    real_scandir = os.scandir
+    monkeypatch.setattr(dataset.os, 'scandir', lambda p: scans.append(p) or real_scandir(p))
+
+    assert dataset.list_data32_files(str(tmp_path)) == [f'trace_{i}.data32' for i in range(3)]
+    assert len(dataset.folder_index(str(tmp_path))) == 3
+    assert dataset.folder_index(str(tmp_path)).sizes['trace_0.data32'] == 1024
+    assert len(scans) == 1
+
+    _write_data32(tmp_path / 'trace_10.data32', np.arange(4))
+    assert dataset.list_data32_files(str(tmp_path))[-1] == 'trace_10.data32'
+    assert len(scans) == 2
+
+
+def test_accumulator_precisions_match_original_matrix_sum(tmp_path):
+    import os
+    from massspec_package.data_processor import DataProcessor
+    from massspec_package.voltage_plotter import VoltagePlotter
+
+    def original_sum(folder):  # the historical bytewise decode + float64 matrix reduction
+        rows = []
+        for name in os.listdir(folder):
+            with open(os.path.join(folder, name), 'rb') as f:
+                rows.append([int.from_bytes(f.read(4), 'little') for _ in range(os.path.getsize(f.name) // 4)])
+        voltage_step = 1
+        return np.sum(np.array(rows, dtype=np.float64) * voltage_step, axis=0)
+
+    _make_folder(tmp_path / 'big', n_files=7, n_samples=300, seed=4)  # full uint32 range
+    small = tmp_path / 'small'
+    small.mkdir()
+    rng = np.random.default_rng(5)
+    for i in range(7):
+        _write_data32(small / f'trace_{i}.data32', rng.integers(0, 2**20, 300))
+
+    for folder in (tmp_path / 'big', small):
+        expected = original_sum(str(folder))
+        for workers, backend in ((1, 'thread'), (3, 'thread'), (3, 'process')):
+            f64 = DataProcessor(str(folder), workers=workers, backend=backend).calculate_summed_voltages()
+            i64 = DataProcessor(str(folder), dtype=np.int64, workers=workers,
+                                backend=backend).calculate_summed_voltages()
+            assert f64.dtype == np.float64 and f64.tobytes() == expected.tobytes()
+            assert i64.dtype == np.int64 and i64.astype(np.float64).tobytes() == expected.tobytes()
+            if folder == small:  # float32 is exact while sums stay below 2**24
+                f32 = DataProcessor(str(folder), dtype=np.float32, workers=workers,
+                                    backend=backend).calculate_summed_voltages()
+                assert f32.dtype == np.float32 and f32.astype(np.float64).tobytes() == expected.tobytes()
+
+    vp = VoltagePlotter(DataProcessor(str(tmp_path / 'big'), dtype=np.int64),
+                        DataProcessor(str(small), dtype=np.int64))
+    vp.calculate_difference()
+    reference = original_sum(str(tmp_path / 'big')) - original_sum(str(small))
+    assert vp.difference.astype(np.float64).tobytes() == reference.tobytes()